@@ -2,7 +2,8 @@ from django.contrib import admin
 from .models import (
     UserProfile, Team, SubDisposition, Package, Lead, LeadTransferRecord,
     PaidCustomer, Company, Invoice, InvoicePDF, AgentSalesHistory,
-    BreakType, Break, Attendance, Complaint, PaymentMethod
+    BreakType, Break, Attendance, Complaint, PaymentMethod, DailySalesRollup,
+    AgentPerformanceSnapshot, ImportJob, ImportJobFile, ImportMapping
 )
 
 admin.site.register(UserProfile)
@@ -21,3 +22,8 @@ admin.site.register(Break)
 admin.site.register(Attendance)
 admin.site.register(Complaint)
 admin.site.register(PaymentMethod)
+admin.site.register(DailySalesRollup)
+admin.site.register(AgentPerformanceSnapshot)
+admin.site.register(ImportJob)
+admin.site.register(ImportJobFile)
+admin.site.register(ImportMapping)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CallcenterAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CallCenter_App'
+
+    def ready(self):
+        from . import signals
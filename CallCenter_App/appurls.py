@@ -8,6 +8,9 @@ from django.views.generic import TemplateView
 urlpatterns = [
     
     path('', views.dashboard, name='dashboard'), 
+    path('dashboard/full/', views.dashboard_full, name='dashboard_full'),
+    path('dashboard/async/', views.dashboard_async, name='dashboard_async'),
+    path('dashboard/cache-stats/', views.dashboard_cache_stats, name='dashboard_cache_stats'),
     path('favicon.ico', RedirectView.as_view(url='/static/favicon.ico')),
     path('login/', CustomLoginView.as_view(), name='login'),
     path('logout/', CustomLogoutView.as_view(), name='logout'),
@@ -55,12 +58,16 @@ urlpatterns = [
 
     path('leads/', views.lead_list, name='lead_list'),
     path('leads/lead_mapping/', views.lead_mapping, name='lead_mapping'),
+    path('leads/bulk-import/', views.bulk_import_leads, name='bulk_import_leads'),
+    path('leads/imports/<int:job_id>/', views.lead_import_progress, name='lead_import_progress'),
+    path('leads/imports/<int:job_id>/rejected/', views.lead_import_rejected_rows, name='lead_import_rejected_rows'),
     path('lead/<int:lead_id>/history/', views.lead_history, name='lead_history'),
     path('leads/export/', views.export_leads, name='export_leads'),
     path('leads/add/', views.create_lead, name='create_lead'), 
     path('leads/edit/<int:lead_id>/', views.edit_lead, name='edit_lead'),
     path('leads/delete/<int:lead_id>/', views.delete_lead, name='delete_lead'),
     path('assign_leads_to_team/', views.assign_leads_to_team, name='assign_leads_to_team'),
+    path('leads/distribute/', views.distribute_lead_list, name='distribute_lead_list'),
     path('lead-transfers/', views.lead_transfers, name='lead_transfers'),
     path('delete-lead-transfer/<int:lead_id>/', views.delete_lead_transfer, name='delete_lead_transfer'),
     path('download-excel-report/', views.download_excel_report, name='download_excel_report'),
@@ -91,6 +98,7 @@ urlpatterns = [
 
     path('analytics/', views.analytics, name='analytics'),
     path('reports/', views.reports, name='reports'),
+    path('api/dashboard/<str:widget>/', views.dashboard_widget, name='dashboard_widget'),
     path('api/leads/', views.get_leads_by_sub_disposition, name='get_leads_by_sub_disposition'),
     path('reports/export-lead-report/', views.export_lead_report, name='export-lead-report'),
 ]
@@ -2,7 +2,8 @@ import json
 import logging
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from .models import Attendance, Break, BreakType, UserProfile
+from .models import Attendance, Break, BreakType, UserProfile, ImportJob
+from .lead_import import import_job_group, import_job_progress
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -232,17 +233,42 @@ class AllBreaksConsumer(AsyncWebsocketConsumer):
             return []
 
 
+class LeadImportProgressConsumer(AsyncWebsocketConsumer):
+    async def connect(self):
+        self.user = self.scope['user']
+        self.job_id = self.scope['url_route']['kwargs']['job_id']
+        self.group_name = import_job_group(self.job_id)
+        if not self.user.is_authenticated:
+            await self.close()
+            return
 
+        progress = await self.get_job_progress()
+        if progress is None:
+            await self.close()
+            return
 
+        await self.channel_layer.group_add(
+            self.group_name,
+            self.channel_name
+        )
+        await self.accept()
+        await self.send(text_data=json.dumps(progress))
 
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(
+            self.group_name,
+            self.channel_name
+        )
 
+    async def import_progress(self, event):
+        await self.send(text_data=json.dumps({
+            key: value for key, value in event.items() if key != 'type'
+        }))
 
-
-
-
-
-
-
-
-
+    async def get_job_progress(self):
+        jobs = ImportJob.objects.filter(id=self.job_id)
+        if not self.user.is_superuser:
+            jobs = jobs.filter(uploaded_by=self.user)
+        job = await sync_to_async(jobs.first)()
+        return import_job_progress(job) if job else None
 
@@ -0,0 +1,90 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from .models import Team
+
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 120)
+DASHBOARD_CACHE_HITS_KEY = 'dashboard:stats:hits'
+DASHBOARD_CACHE_MISSES_KEY = 'dashboard:stats:misses'
+
+DASHBOARD_WIDGETS = ('sales-totals', 'sales-series', 'team-sales', 'attendance', 'overview')
+
+ROLE_KEYS = {
+    'superuser': 'superuser',
+    'Team Leader': 'team_leader',
+    'Agent': 'agent',
+}
+
+
+def dashboard_cache_key(role, scope_id, day=None, widget=None):
+    day = day or timezone.localtime(timezone.now()).date()
+    key = f"dashboard:{ROLE_KEYS.get(role, 'other')}:{scope_id}:{day.isoformat()}"
+    return f"{key}:{widget}" if widget else key
+
+
+def dashboard_cache_keys(role, scope_id):
+    return [dashboard_cache_key(role, scope_id)] + [
+        dashboard_cache_key(role, scope_id, widget=widget) for widget in DASHBOARD_WIDGETS
+    ]
+
+
+def count_dashboard_cache(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_cached_dashboard(role, scope_id, build_context, widget=None):
+    key = dashboard_cache_key(role, scope_id, widget=widget)
+    context = cache.get(key)
+    if context is None:
+        count_dashboard_cache(DASHBOARD_CACHE_MISSES_KEY)
+        context = build_context()
+        cache.set(key, context, DASHBOARD_CACHE_TIMEOUT)
+    else:
+        count_dashboard_cache(DASHBOARD_CACHE_HITS_KEY)
+    return context
+
+
+async def aget_cached_dashboard(role, scope_id, build_context):
+    key = dashboard_cache_key(role, scope_id)
+    context = await cache.aget(key)
+    if context is None:
+        await sync_to_async(count_dashboard_cache)(DASHBOARD_CACHE_MISSES_KEY)
+        context = await build_context()
+        await cache.aset(key, context, DASHBOARD_CACHE_TIMEOUT)
+    else:
+        await sync_to_async(count_dashboard_cache)(DASHBOARD_CACHE_HITS_KEY)
+    return context
+
+
+def invalidate_dashboard_cache(agent_ids=(), team_ids=()):
+    agent_ids = {agent_id for agent_id in agent_ids if agent_id}
+    team_ids = {team_id for team_id in team_ids if team_id}
+
+    keys = dashboard_cache_keys('superuser', 0)
+    for agent_id in agent_ids:
+        keys += dashboard_cache_keys('Agent', agent_id)
+    if agent_ids or team_ids:
+        leader_ids = Team.objects.filter(
+            Q(id__in=team_ids) | Q(agents__in=agent_ids)
+        ).values_list('leader_id', flat=True).distinct()
+        for leader_id in leader_ids:
+            keys += dashboard_cache_keys('Team Leader', leader_id)
+    cache.delete_many(keys)
+
+
+def get_dashboard_cache_stats():
+    hits = cache.get(DASHBOARD_CACHE_HITS_KEY, 0)
+    misses = cache.get(DASHBOARD_CACHE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round((hits / total) * 100, 2) if total else 0,
+        'timeout': DASHBOARD_CACHE_TIMEOUT,
+    }
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm, AuthenticationForm, PasswordResetForm, SetPasswordForm
-from .models import UserProfile, Team, Company, Invoice, Lead, BreakType, Package, SubDisposition, PaidCustomer, PaymentMethod, Complaint
+from .models import UserProfile, Team, Company, Invoice, Lead, BreakType, Package, SubDisposition, PaidCustomer, PaymentMethod, Complaint, ImportMapping, normalize_contact_number
 from django.core.validators import FileExtensionValidator
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
@@ -175,6 +175,24 @@ class LeadImportForm(forms.Form):
         widget=forms.ClearableFileInput(attrs={'accept': '.csv,.xlsx'})  
     )
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+class MultipleFileField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput(attrs={'accept': '.csv,.xlsx'}))
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(item, initial) for item in data]
+        return [single_file_clean(data, initial)]
+
+class BulkLeadImportForm(forms.Form):
+    files = MultipleFileField(label='Upload Files', validators=[FileExtensionValidator(['csv', 'xlsx'])])
+    mapping = forms.ModelChoiceField(queryset=ImportMapping.objects.order_by('name'), empty_label='Saved Mapping')
+
 class LeadForm(forms.ModelForm):
     class Meta:
         model = Lead
@@ -199,6 +217,13 @@ class LeadForm(forms.ModelForm):
         for field_name, field in self.fields.items():
             field.label = field_name.replace('_', ' ').capitalize()
 
+    def clean_contact_number(self):
+        contact_number = self.cleaned_data['contact_number']
+        duplicates = Lead.objects.filter(contact_key=normalize_contact_number(contact_number)).exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise ValidationError('A lead with this contact number already exists.')
+        return contact_number
+
 class BreakTypeForm(forms.ModelForm):
     class Meta:
         model = BreakType
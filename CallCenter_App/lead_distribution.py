@@ -0,0 +1,137 @@
+import heapq
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+from django.utils.dateparse import parse_date
+from .models import Lead
+from .utils import reassign_leads
+
+DISTRIBUTION_STRATEGIES = (
+    ('round_robin', 'Round robin'),
+    ('weighted', 'Weighted by commitment'),
+    ('capacity', 'By open-lead capacity'),
+)
+OPEN_LEAD_DISPOSITIONS = ('Fresh',)
+
+
+def clean_distribution_options(capacity, start_date, end_date):
+    # Checks the capacity and the date filters of a distribution before any lead is queried, so
+    # the lead list action and the distribute_leads command reject bad input with the same
+    # message. Returns the capacity as an int, or None.
+    if capacity is not None and capacity != '':
+        try:
+            capacity = int(capacity)
+        except (TypeError, ValueError):
+            raise ValueError('Capacity must be a whole number.')
+        if capacity < 1:
+            raise ValueError('Capacity must be at least 1.')
+    else:
+        capacity = None
+
+    dates = {}
+    for label, value in (('Start date', start_date), ('End date', end_date)):
+        if value:
+            try:
+                dates[label] = parse_date(value)
+            except ValueError:
+                dates[label] = None
+            if dates[label] is None:
+                raise ValueError(f'{label} must be a date as YYYY-MM-DD.')
+    if len(dates) == 2 and dates['Start date'] > dates['End date']:
+        raise ValueError('Start date must not be after end date.')
+    return capacity
+
+
+def distribution_agents(team):
+    return list(team.agents.filter(role='Agent', status='Active').select_related('user').order_by('id'))
+
+
+def round_robin_quotas(lead_count, agents):
+    base, extra = divmod(lead_count, len(agents))
+    return np.array([base + (index < extra) for index in range(len(agents))], dtype=np.int64)
+
+
+def weighted_quotas(lead_count, agents):
+    # Largest-remainder split by commitment; agents without a commitment count as the smallest
+    # one set, or everyone is weighted equally when nobody has one.
+    weights = np.array([float(agent.commitment or 0) for agent in agents])
+    if not weights.any():
+        return round_robin_quotas(lead_count, agents)
+    weights[weights <= 0] = weights[weights > 0].min()
+    shares = weights / weights.sum() * lead_count
+    quotas = np.floor(shares).astype(np.int64)
+    remainder = lead_count - quotas.sum()
+    quotas[np.argsort(-(shares - quotas), kind='stable')[:remainder]] += 1
+    return quotas
+
+
+def capacity_quotas(lead_count, agents, capacity=None):
+    # Fills the least loaded agents first, counting each agent's open leads, so loads even out;
+    # no agent is taken past `capacity` open leads, and leads beyond everyone's room stay unassigned.
+    open_leads = dict(
+        Lead.objects.filter(assigned_to__in=agents, disposition__in=OPEN_LEAD_DISPOSITIONS)
+        .order_by()
+        .values('assigned_to')
+        .annotate(count=Count('id'))
+        .values_list('assigned_to', 'count')
+    )
+    quotas = np.zeros(len(agents), dtype=np.int64)
+    loads = [(open_leads.get(agent.id, 0), index) for index, agent in enumerate(agents)]
+    loads = [(load, index) for load, index in loads if capacity is None or load < capacity]
+    heapq.heapify(loads)
+    for _ in range(lead_count):
+        if not loads:
+            break
+        load, index = heapq.heappop(loads)
+        quotas[index] += 1
+        if capacity is None or load + 1 < capacity:
+            heapq.heappush(loads, (load + 1, index))
+    return quotas
+
+
+def distribution_order(quotas):
+    # Spreads each agent's quota evenly over the lead order instead of handing out contiguous
+    # blocks: agent i's j-th lead goes at position (j + 0.5) / quota_i, and sorting those
+    # positions gives the agent index for every lead in turn.
+    agent_indexes = np.repeat(np.arange(len(quotas)), quotas)
+    positions = np.concatenate([(np.arange(quota) + 0.5) / quota for quota in quotas if quota])
+    return agent_indexes[np.argsort(positions, kind='stable')]
+
+
+def plan_distribution(lead_ids, agents, strategy, capacity=None):
+    if strategy == 'round_robin':
+        quotas = round_robin_quotas(len(lead_ids), agents)
+    elif strategy == 'weighted':
+        quotas = weighted_quotas(len(lead_ids), agents)
+    elif strategy == 'capacity':
+        quotas = capacity_quotas(len(lead_ids), agents, capacity)
+    else:
+        raise ValueError(f'Unknown distribution strategy {strategy}.')
+    if not quotas.sum():
+        return {}
+    order = distribution_order(quotas)
+    assigned_ids = lead_ids[:len(order)]
+    return {agent: assigned_ids[order == index] for index, agent in enumerate(agents) if quotas[index]}
+
+
+def distribute_leads(leads, team, strategy, performed_by, capacity=None):
+    # Assigns the leads, oldest first, across the team's active agents. The plan is computed in
+    # memory and each agent's share is applied with one bulk reassignment.
+    agents = distribution_agents(team)
+    if not agents:
+        raise ValueError(f'{team.name} has no active agents.')
+
+    lead_ids = np.fromiter(
+        leads.order_by('id').values_list('id', flat=True).iterator(chunk_size=10000), dtype=np.int64
+    )
+    plan = plan_distribution(lead_ids, agents, strategy, capacity)
+    label = dict(DISTRIBUTION_STRATEGIES)[strategy].lower()
+    with transaction.atomic():
+        for agent, agent_lead_ids in plan.items():
+            reassign_leads(
+                Lead.objects.filter(id__in=agent_lead_ids.tolist()),
+                {'assigned_to': agent, 'assigned_to_team': team},
+                'Lead Assigned', performed_by,
+                f'Distributed to agent {agent.user.get_full_name()} ({label})'
+            )
+    return {agent: len(agent_lead_ids) for agent, agent_lead_ids in plan.items()}
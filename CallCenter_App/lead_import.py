@@ -0,0 +1,685 @@
+import codecs
+import csv
+import io
+import os
+import shutil
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime, timedelta
+from itertools import islice
+import django
+import numpy as np
+import openpyxl
+import pandas as pd
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, connections, models, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from .models import ImportJob, Lead, PaidCustomer, SubDisposition, Team, UserProfile, normalize_contact_number
+from .utils import sales_rollup_cells, refresh_sales_rollup
+from .dashboard_cache import invalidate_dashboard_cache
+
+IMPORT_BATCH_SIZE = 2000
+ASSIGNMENT_FIELDS = {'assigned_to', 'assigned_to_team'}
+DATE_FIELDS = ('date', 'reminder')
+CONTACT_NUMBER_PATTERN = r'\+?1?\d{9,15}'
+LOOKUP_FIELDS = ('assigned_to', 'assigned_to_team', 'sub_disposition')
+LOOKUP_LABELS = {'assigned_to': 'user', 'assigned_to_team': 'team', 'sub_disposition': 'sub disposition'}
+COPY_STAGING_TABLE = 'lead_import_staging'
+LEAD_IMPORT_WORKERS = getattr(settings, 'LEAD_IMPORT_WORKERS', None) or os.cpu_count() or 1
+# Seconds an upload may wait for its column mapping before the worker discards it.
+LEAD_IMPORT_UPLOAD_EXPIRY = getattr(settings, 'LEAD_IMPORT_UPLOAD_EXPIRY', 24 * 60 * 60)
+
+
+def lead_import_lookups():
+    # Foreign keys in an import file may hold an id or a name; both are resolved from these maps
+    # so no row needs its own query. Fresh is the sub disposition Lead.save would default to.
+    profiles = {}
+    for profile_id, username in UserProfile.objects.values_list('id', 'user__username'):
+        profiles[str(profile_id)] = profile_id
+        profiles[username.lower()] = profile_id
+    teams = {}
+    for team_id, name in Team.objects.values_list('id', 'name'):
+        teams[str(team_id)] = team_id
+        teams[name.lower()] = team_id
+    sub_dispositions = {}
+    for sub_disposition_id, name in SubDisposition.objects.values_list('id', 'name'):
+        sub_dispositions[str(sub_disposition_id)] = sub_disposition_id
+        sub_dispositions[name.lower()] = sub_disposition_id
+    default_sub_disposition, _ = SubDisposition.objects.get_or_create(name='Fresh')
+    return {
+        'assigned_to': profiles,
+        'assigned_to_team': teams,
+        'sub_disposition': sub_dispositions,
+        'default_sub_disposition': default_sub_disposition.id,
+    }
+
+
+def build_import_lead(row, lookups):
+    lead = Lead()
+    for field, value in row.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value == '':
+            value = None
+        if field in LOOKUP_FIELDS:
+            value = lookups[field].get(str(value).lower()) if value is not None else None
+            setattr(lead, f'{field}_id', value)
+        else:
+            setattr(lead, field, value)
+    if lead.sub_disposition_id is None:
+        lead.sub_disposition_id = lookups['default_sub_disposition']
+    lead.contact_key = normalize_contact_number(lead.contact_number)
+    return lead
+
+
+class ContactKeyIndex:
+    # The contact keys of every existing lead, loaded once per import as a sorted int64 array
+    # (a key is "+" and up to 15 digits), so each chunk can tell new contacts from existing ones
+    # without asking the database. Keys inserted during the import are tracked alongside.
+    def __init__(self):
+        keys = Lead.objects.exclude(contact_key='').values_list('contact_key', flat=True)
+        self.keys = np.unique(np.fromiter(
+            (int(key[1:]) for key in keys.iterator(chunk_size=10000)), dtype=np.int64
+        ))
+        self.added = set()
+
+    def contains(self, keys):
+        # Keys that cannot be normalized are reported as present so they go through the
+        # database lookup like before.
+        values = np.array([int(key[1:]) if key.startswith('+') else -1 for key in keys], dtype=np.int64)
+        positions = np.searchsorted(self.keys, values).clip(max=max(len(self.keys) - 1, 0))
+        found = self.keys[positions] == values if len(self.keys) else np.zeros(len(values), dtype=bool)
+        return [bool(hit or value < 0) or key in self.added for key, value, hit in zip(keys, values, found)]
+
+
+def import_lead_chunk(rows, lookups, existing_keys):
+    leads = {}
+    for row in rows:
+        lead = build_import_lead(row, lookups)
+        if lead.contact_number:
+            leads[lead.contact_key or lead.contact_number] = lead
+    if not leads:
+        return {'inserted': 0, 'updated': 0, 'agent_ids': set(), 'team_ids': set()}
+
+    update_fields = sorted({field for row in rows for field in row} - {'id', 'contact_number'} | {'contact_key'})
+    agent_ids = {lead.assigned_to_id for lead in leads.values()}
+    team_ids = {lead.assigned_to_team_id for lead in leads.values()}
+
+    # Only rows whose key is already known need the lookup and rollup bookkeeping below; when
+    # a chunk is all new contacts, it costs a single insert.
+    known_keys = [key for key, known in zip(leads, existing_keys.contains(list(leads))) if known]
+
+    with transaction.atomic():
+        # Existing leads are matched on the normalized key, then written back under their stored
+        # number so the upsert's conflict on contact_number finds them.
+        existing_numbers = {}
+        if known_keys:
+            existing = Lead.objects.filter(contact_key__in=known_keys).order_by('-id').values_list(
+                'contact_key', 'contact_number', 'assigned_to', 'assigned_to_team'
+            )
+            for contact_key, contact_number, agent_id, team_id in existing:
+                existing_numbers[contact_key] = contact_number
+                agent_ids.add(agent_id)
+                team_ids.add(team_id)
+        for key, lead in leads.items():
+            if key in existing_numbers:
+                lead.contact_number = existing_numbers[key]
+
+        reassigned = bool(existing_numbers) and not ASSIGNMENT_FIELDS.isdisjoint(update_fields)
+        if reassigned:
+            paid_customers = PaidCustomer.objects.filter(lead__contact_number__in=list(existing_numbers.values()))
+            cells = sales_rollup_cells(paid_customers)
+
+        Lead.objects.bulk_create(
+            leads.values(), update_conflicts=True, unique_fields=['contact_number'], update_fields=update_fields
+        )
+
+        if reassigned:
+            refresh_sales_rollup(cells | sales_rollup_cells(paid_customers))
+
+    existing_keys.added.update(leads)
+    updated = sum(1 for key in leads if key in existing_numbers)
+    return {'inserted': len(leads) - updated, 'updated': updated, 'agent_ids': agent_ids, 'team_ids': team_ids}
+
+
+def import_leads(rows, batch_size=IMPORT_BATCH_SIZE, on_progress=None):
+    lookups = lead_import_lookups()
+    existing_keys = ContactKeyIndex()
+    totals = {'processed': 0, 'inserted': 0, 'updated': 0}
+    agent_ids, team_ids = set(), set()
+    chunk = []
+
+    def flush():
+        result = import_lead_chunk(chunk, lookups, existing_keys)
+        totals['processed'] += len(chunk)
+        totals['inserted'] += result['inserted']
+        totals['updated'] += result['updated']
+        agent_ids.update(result['agent_ids'])
+        team_ids.update(result['team_ids'])
+        if on_progress:
+            on_progress(totals)
+
+    for row in rows:
+        # Rows from different files may carry different fields; a chunk only holds rows with
+        # the same ones, since its upsert updates every field present in the chunk.
+        if chunk and row.keys() != chunk[0].keys():
+            flush()
+            chunk = []
+        chunk.append(row)
+        if len(chunk) >= batch_size:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+
+    invalidate_dashboard_cache(agent_ids, team_ids)
+    return totals
+
+
+def is_xlsx_file(staged):
+    return staged.name.lower().endswith('.xlsx')
+
+
+def xlsx_cell_text(value):
+    # Cells come back typed; render them the way the same sheet saved as CSV would, so both
+    # formats go through the same validation. Numbers typed into a phone column arrive as floats.
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value.time() != datetime.min.time() else value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+@contextmanager
+def import_file_reader(staged):
+    # Yields a staged file's rows as lists of strings, one at a time, so neither the mapping
+    # page nor the import ever holds the whole upload in memory. XLSX files are read with
+    # openpyxl in read-only mode, which streams the sheet instead of loading it.
+    with staged.open('rb'):
+        if is_xlsx_file(staged):
+            workbook = openpyxl.load_workbook(staged, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                yield ([xlsx_cell_text(value) for value in row] for row in rows)
+            finally:
+                workbook.close()
+        else:
+            yield csv.reader(codecs.iterdecode(staged, 'utf-8-sig'))
+
+
+def import_file_header(staged):
+    with import_file_reader(staged) as reader:
+        return next(reader, [])
+
+
+def import_job_header(job):
+    return import_file_header(job.file)
+
+
+def import_file_row_count(staged):
+    with import_file_reader(staged) as reader:
+        return max(sum(1 for _ in reader) - 1, 0)
+
+
+def parse_import_dates(values):
+    # One vectorized pass with the format pandas infers from the column; only values that do
+    # not fit it are parsed again one by one.
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        parsed = pd.to_datetime(values, errors='coerce')
+        retry = parsed.isna() & values.ne('')
+        if retry.any():
+            parsed[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+    return parsed
+
+
+def validate_lead_frame(frame, lookups):
+    # Checks a chunk of mapped rows column by column and returns the rows that can be imported,
+    # normalized, and the rejected ones with an `errors` column explaining why. A user, team or
+    # sub disposition that does not resolve rejects the row rather than clearing the lead's.
+    frame = frame.fillna('').apply(lambda column: column.str.strip())
+    raw = frame.copy()
+    errors = pd.Series('', index=frame.index)
+
+    def reject(mask, message):
+        nonlocal errors
+        errors = errors.mask(mask, errors + f'{message}; ')
+
+    contact_number = frame.get('contact_number', pd.Series('', index=frame.index))
+    reject(contact_number.eq(''), 'contact_number is required')
+    reject(contact_number.ne('') & ~contact_number.str.fullmatch(CONTACT_NUMBER_PATTERN), 'contact_number is not a valid phone number')
+
+    for field in DATE_FIELDS:
+        if field in frame:
+            parsed = parse_import_dates(frame[field])
+            reject(frame[field].ne('') & parsed.isna(), f'{field} is not a valid date')
+            formatted = parsed.dt.strftime('%Y-%m-%d')
+            # Datetime fields keep a time of day when one was given, as XLSX cells do.
+            if isinstance(Lead._meta.get_field(field), models.DateTimeField):
+                timed = parsed.notna() & parsed.ne(parsed.dt.normalize())
+                formatted = formatted.where(~timed, parsed.dt.strftime('%Y-%m-%d %H:%M:%S'))
+            frame[field] = formatted.fillna('')
+
+    if 'capital' in frame:
+        capital = frame['capital'].str.replace(',', '', regex=False)
+        amount = pd.to_numeric(capital, errors='coerce')
+        reject(capital.ne('') & amount.isna(), 'capital is not a number')
+        reject(amount.abs().ge(10 ** 8), 'capital is too large')
+        frame['capital'] = capital
+
+    for field in LOOKUP_FIELDS:
+        if field in frame:
+            resolved = frame[field].str.lower().isin(list(lookups[field]))
+            reject(frame[field].ne('') & ~resolved, f'{field} does not match any {LOOKUP_LABELS[field]}')
+
+    for field in frame.columns:
+        max_length = getattr(Lead._meta.get_field(field), 'max_length', None)
+        if max_length and field not in LOOKUP_FIELDS:
+            reject(frame[field].str.len().gt(max_length), f'{field} is longer than {max_length} characters')
+
+    rejected = errors.ne('')
+    report = raw[rejected].assign(errors=errors[rejected].str.rstrip('; '))
+    return frame[~rejected], report
+
+
+def import_file_chunks(staged, columns):
+    # Rows are streamed from the file and gathered into frames of IMPORT_BATCH_SIZE rows, so
+    # memory stays bounded by the chunk. A CSV line with more fields than the header does not
+    # fit the file's layout: it is left out of the frame and yielded alongside it, by data row
+    # index, so it can be reported while the rest of the file still imports.
+    width = len(import_file_header(staged))
+    check_width = not is_xlsx_file(staged)
+    with import_file_reader(staged) as reader:
+        next(reader, None)
+        start = 0
+        while True:
+            rows = list(islice(reader, IMPORT_BATCH_SIZE))
+            if not rows:
+                break
+            indexed = list(zip(range(start, start + len(rows)), rows))
+            malformed = {index: row for index, row in indexed if check_width and len(row) > width}
+            kept = [(index, row) for index, row in indexed if index not in malformed]
+            frame = pd.DataFrame([row for _, row in kept], dtype=str, index=[index for index, _ in kept])
+            yield frame.reindex(columns=columns).astype(object), malformed
+            start += len(rows)
+
+
+def malformed_line_report(malformed, mapping, width):
+    report = pd.DataFrame(
+        [[row[column] for column in mapping.values()] for row in malformed.values()],
+        columns=list(mapping), index=list(malformed), dtype=str,
+    )
+    report['errors'] = [f'line has {len(row)} fields but the header has {width}' for row in malformed.values()]
+    return report
+
+
+def validated_chunks(staged, mapping, report, stats, lookups):
+    # Validates a staged file chunk by chunk and yields the valid rows of each chunk as a frame
+    # indexed by data row; rejected and malformed rows are appended to `report` with their
+    # line number.
+    width = len(import_file_header(staged))
+    for chunk, malformed in import_file_chunks(staged, sorted(set(mapping.values()))):
+        frame = chunk[list(mapping.values())]
+        frame.columns = list(mapping)
+        valid, rejected = validate_lead_frame(frame, lookups)
+        if malformed:
+            parts = [rejected, malformed_line_report(malformed, mapping, width)]
+            rejected = pd.concat([part for part in parts if len(part)]).sort_index()
+        stats['rows'] = stats.get('rows', 0) + len(frame) + len(malformed)
+        if len(rejected):
+            rejected.insert(0, 'row', rejected.index + 2)
+            rejected.to_csv(report, header=report.tell() == 0, index=False)
+            stats['rejected'] += len(rejected)
+        yield valid
+
+
+def validated_rows(staged, mapping, report, stats, lookups):
+    # Yields each valid row with its location in the file, in the rejected-rows report's terms.
+    for valid in validated_chunks(staged, mapping, report, stats, lookups):
+        for line, row in zip(valid.index + 2, valid.to_dict('records')):
+            yield {'row': line}, row
+
+
+def import_report_columns(job):
+    return [*(['file'] if job.files.exists() else []), 'row', *job.mapping, 'errors']
+
+
+def write_rejected_rows(report, columns, rows):
+    writer = csv.DictWriter(report, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+    if report.tell() == 0:
+        writer.writeheader()
+    writer.writerows(rows)
+
+
+def import_job_group(job_id):
+    return f'lead_import_{job_id}'
+
+
+def import_job_progress(job):
+    return {
+        'status': job.status,
+        'total': job.total_rows,
+        'processed': job.processed_rows,
+        'inserted': job.inserted_rows,
+        'updated': job.updated_rows,
+        'rejected': job.rejected_rows,
+        'rejected_report': bool(job.rejected_file),
+        'error': job.error,
+    }
+
+
+def publish_import_progress(job):
+    async_to_sync(get_channel_layer().group_send)(
+        import_job_group(job.id),
+        {'type': 'import_progress', **import_job_progress(job)}
+    )
+
+
+def claim_import_job():
+    # SKIP LOCKED lets several workers poll the same queue without blocking on, or both
+    # picking up, a job another worker is claiming.
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update(skip_locked=True).filter(status='Queued').order_by('id').first()
+        if job:
+            job.status = 'Importing'
+            job.save(update_fields=['status'])
+    return job
+
+
+def validate_import_file(name, original_name, columns, output_path):
+    # Runs in a worker process of parallel_validated_rows: resolves the saved mapping against
+    # this file's header, validates it, and writes the valid rows (with their line number) and
+    # the rejected rows to two CSV files for the writer to pick up. The valid rows carry only the
+    # mapped columns this file has, so a column it lacks is left as it is on existing leads.
+    staged = default_storage.open(name, 'rb')
+    header = [column.strip().lower() for column in import_file_header(staged)]
+    mapping = {field: header.index(column.lower()) for field, column in columns.items() if column.lower() in header}
+    if 'contact_number' not in mapping:
+        raise ValueError(f"{original_name} has no {columns.get('contact_number', 'contact_number')} column.")
+
+    stats = {'rejected': 0}
+    result = {'valid': f'{output_path}.valid.csv', 'rejected': f'{output_path}.rejected.csv', 'rows': 0}
+    with open(result['valid'], 'w', newline='', encoding='utf-8') as valid_rows, \
+            open(result['rejected'], 'w', newline='', encoding='utf-8') as rejected_rows:
+        for valid in validated_chunks(staged, mapping, rejected_rows, stats, lead_import_lookups()):
+            valid.insert(0, 'row', valid.index + 2)
+            valid.to_csv(valid_rows, header=valid_rows.tell() == 0, index=False)
+    staged.close()
+    result['rows'] = stats.get('rows', 0)
+    return result
+
+
+@contextmanager
+def parallel_validated_rows(job, report, stats):
+    # Multi-file jobs parse and validate their files in a process pool, one file per process,
+    # while this process is the single writer: it takes the files' valid rows in upload order
+    # and drops any contact already seen in an earlier file. job.mapping maps lead fields to
+    # column names here, since each file may order its columns differently.
+    files = list(job.files.order_by('id'))
+    report_columns = import_report_columns(job)
+    workdir = tempfile.mkdtemp(prefix='lead_import_')
+
+    def merged_rows(futures):
+        seen = set()
+        for import_file, future in zip(files, futures):
+            result = future.result()
+            job.total_rows += result['rows']
+            job.save(update_fields=['total_rows'])
+
+            duplicates = []
+            with open(result['valid'], newline='', encoding='utf-8') as valid_rows:
+                for row in csv.DictReader(valid_rows):
+                    line = row.pop('row')
+                    key = normalize_contact_number(row['contact_number']) or row['contact_number']
+                    if key in seen:
+                        duplicates.append({**row, 'row': line, 'errors': 'contact_number repeats a row of an earlier file'})
+                        continue
+                    seen.add(key)
+                    yield {'file': import_file.original_name, 'row': line}, row
+
+            rejected = [pd.DataFrame(duplicates)] if duplicates else []
+            if os.path.getsize(result['rejected']):
+                rejected.insert(0, pd.read_csv(result['rejected'], dtype=str, keep_default_na=False))
+            if rejected:
+                rejected = pd.concat(rejected).reindex(columns=report_columns, fill_value='')
+                rejected['file'] = import_file.original_name
+                rejected.to_csv(report, header=report.tell() == 0, index=False)
+                stats['rejected'] += len(rejected)
+
+    # Worker processes are forked from this one and must not inherit its database connection.
+    connections.close_all()
+    try:
+        with ProcessPoolExecutor(max_workers=min(LEAD_IMPORT_WORKERS, len(files)), initializer=django.setup) as pool:
+            futures = [
+                pool.submit(
+                    validate_import_file, import_file.file.name, import_file.original_name,
+                    job.mapping, os.path.join(workdir, str(index))
+                )
+                for index, import_file in enumerate(files)
+            ]
+            yield merged_rows(futures)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def delete_staged_files(job):
+    # The uploaded files are only needed until the job is done; the job keeps their names.
+    if job.file:
+        job.file.delete(save=False)
+    for import_file in job.files.all():
+        import_file.file.delete()
+
+
+def expire_uploaded_jobs():
+    # Uploads whose mapping was never submitted are failed and their files removed, so
+    # abandoned uploads do not pile up under MEDIA_ROOT.
+    cutoff = timezone.now() - timedelta(seconds=LEAD_IMPORT_UPLOAD_EXPIRY)
+    with transaction.atomic():
+        jobs = list(ImportJob.objects.select_for_update(skip_locked=True).filter(status='Uploaded', created_at__lt=cutoff))
+        for job in jobs:
+            delete_staged_files(job)
+            job.status = 'Failed'
+            job.error = 'The upload expired before its columns were mapped.'
+            job.completed_at = timezone.now()
+            job.save(update_fields=['file', 'status', 'error', 'completed_at'])
+    return len(jobs)
+
+
+def run_import_job(job):
+    stats = {'rejected': 0}
+    progress_fields = ['processed_rows', 'inserted_rows', 'updated_rows', 'rejected_rows']
+
+    def report(totals):
+        job.processed_rows = totals['processed'] + stats['rejected']
+        job.inserted_rows = totals['inserted']
+        job.updated_rows = totals['updated']
+        job.rejected_rows = stats['rejected']
+        job.save(update_fields=progress_fields)
+        publish_import_progress(job)
+
+    try:
+        with tempfile.TemporaryFile('w+', newline='', encoding='utf-8') as rejected_rows:
+            if job.files.exists():
+                sources = parallel_validated_rows(job, rejected_rows, stats)
+            else:
+                job.total_rows = import_file_row_count(job.file)
+                job.save(update_fields=['total_rows'])
+                publish_import_progress(job)
+                sources = nullcontext(validated_rows(job.file, job.mapping, rejected_rows, stats, lead_import_lookups()))
+
+            with sources as rows:
+                if job.method == 'copy':
+                    totals = copy_import_leads(rows, stats, rejected_rows, import_report_columns(job), on_progress=report)
+                else:
+                    totals = import_leads((row for _, row in rows), on_progress=report)
+            report(totals)
+            if stats['rejected']:
+                rejected_rows.seek(0)
+                name = f'{os.path.splitext(job.original_name)[0]}_rejected.csv'
+                job.rejected_file.save(name, File(rejected_rows), save=False)
+        job.status = 'Completed'
+    except Exception as e:
+        job.status = 'Failed'
+        job.error = str(e)
+    finally:
+        if job.status in ('Completed', 'Failed'):
+            delete_staged_files(job)
+
+    job.completed_at = timezone.now()
+    job.save(update_fields=['file', 'status', 'error', 'rejected_file', 'completed_at'])
+    publish_import_progress(job)
+    return job
+
+
+def copy_import_lines(rows, lookups, fields, stats, rejected, field_groups):
+    # Rows are built and validated with the same rules as the ORM path; values that would fail
+    # the whole COPY (a bad capital, an overlong name) reject just their row, which is added to
+    # `rejected` with its location and the reason. Each row is tagged with the index of its set
+    # of fields in `field_groups`, so the merge only updates the fields the row came with.
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for location, row in rows:
+        lead = build_import_lead(row, lookups)
+        values, errors = [], []
+        for field in fields:
+            value = None
+            try:
+                value = field.to_python(getattr(lead, field.attname))
+                if value is not None:
+                    field.run_validators(value)
+                    # Naive reminders are in the site's time zone, as the ORM path saves them;
+                    # COPY would read them in the session's UTC.
+                    if isinstance(value, datetime) and timezone.is_naive(value):
+                        value = timezone.make_aware(value)
+                    value = field.get_db_prep_value(value, connection)
+            except ValidationError as error:
+                errors += [f'{field.name}: {message}' for message in error.messages]
+            values.append(value)
+        if errors:
+            stats['rejected'] += 1
+            rejected.append({**location, **row, 'errors': '; '.join(errors)})
+            continue
+        stats['copied'] += 1
+        group = field_groups.setdefault(frozenset(row), len(field_groups))
+        writer.writerow(['\\N' if value is None else value for value in values] + [group])
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+
+
+def copy_import_leads(rows, stats, report, report_columns, on_progress=None):
+    # Fast path for very large files: rows are copied into a temporary table shaped like the
+    # lead table with one COPY FROM STDIN per chunk, then merged in one INSERT ... ON CONFLICT.
+    # The chunks are copied outside the merge transaction so the progress and rejected rows
+    # saved after each one are visible while the import runs. Existing leads are matched on the
+    # normalized contact key, as on the ORM path; when a file repeats a contact, its last row wins.
+    lookups = lead_import_lookups()
+    lead_table = connection.ops.quote_name(Lead._meta.db_table)
+    staging = connection.ops.quote_name(COPY_STAGING_TABLE)
+    fields = [field for field in Lead._meta.concrete_fields if not field.primary_key]
+    columns = [connection.ops.quote_name(field.column) for field in fields]
+    column_list = ', '.join(columns)
+    stats['copied'] = 0
+    rejected = []
+    field_groups = {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMPORARY TABLE {staging} (LIKE {lead_table} INCLUDING DEFAULTS)')
+        try:
+            cursor.execute(
+                f'ALTER TABLE {staging} DROP COLUMN id, ADD COLUMN staging_row bigserial, ADD COLUMN staging_group integer'
+            )
+            lines = copy_import_lines(rows, lookups, fields, stats, rejected, field_groups)
+            while True:
+                chunk = list(islice(lines, IMPORT_BATCH_SIZE))
+                if chunk:
+                    cursor.copy_expert(
+                        f"COPY {staging} ({column_list}, staging_group) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                        io.StringIO(''.join(chunk)),
+                    )
+                if rejected:
+                    write_rejected_rows(report, report_columns, rejected)
+                    rejected.clear()
+                if not chunk:
+                    break
+                if on_progress:
+                    on_progress({'processed': stats['copied'], 'inserted': 0, 'updated': 0})
+
+            with transaction.atomic():
+                totals, scope = merge_copied_leads(cursor, staging, lead_table, fields, field_groups)
+        finally:
+            cursor.execute(f'DROP TABLE IF EXISTS {staging}')
+
+    invalidate_dashboard_cache({agent_id for agent_id, _ in scope}, {team_id for _, team_id in scope})
+    return {'processed': stats['copied'], **totals}
+
+
+def merge_copied_leads(cursor, staging, lead_table, fields, field_groups):
+    column_list = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    cursor.execute(f'ANALYZE {staging}')
+
+    # Point rows at the stored number of the lead they match, so ON CONFLICT finds it.
+    cursor.execute(f"""
+        UPDATE {staging} s SET contact_number = l.contact_number
+        FROM (
+            SELECT DISTINCT ON (contact_key) contact_key, contact_number
+            FROM {lead_table} WHERE contact_key <> '' ORDER BY contact_key, id
+        ) l
+        WHERE s.contact_key = l.contact_key
+    """)
+
+    cursor.execute(f"""
+        SELECT DISTINCT l.assigned_to_id, l.assigned_to_team_id
+        FROM {lead_table} l JOIN {staging} s ON s.contact_number = l.contact_number
+        UNION
+        SELECT DISTINCT assigned_to_id, assigned_to_team_id FROM {staging}
+    """)
+    scope = cursor.fetchall()
+
+    reassigned = any(not ASSIGNMENT_FIELDS.isdisjoint(group) for group in field_groups)
+    if reassigned:
+        paid_customers = PaidCustomer.objects.filter(
+            lead__contact_number__in=RawSQL(f'SELECT contact_number FROM {staging}', [])
+        )
+        cells = sales_rollup_cells(paid_customers)
+
+    # Each set of fields is merged on its own; a contact only appears under one of them, since
+    # multi-file imports drop contacts repeated in a later file.
+    inserted = updated = 0
+    for group_fields, group in field_groups.items():
+        update_columns = [
+            connection.ops.quote_name(field.column) for field in fields
+            if field.name in group_fields | {'contact_key'} and field.name != 'contact_number'
+        ]
+        conflict = 'DO UPDATE SET ' + ', '.join(f'{column} = EXCLUDED.{column}' for column in update_columns)
+        cursor.execute(f"""
+            WITH merged AS (
+                INSERT INTO {lead_table} ({column_list})
+                SELECT DISTINCT ON (COALESCE(NULLIF(contact_key, ''), contact_number)) {column_list}
+                FROM {staging} WHERE staging_group = %s
+                ORDER BY COALESCE(NULLIF(contact_key, ''), contact_number), staging_row DESC
+                ON CONFLICT (contact_number) {conflict}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+        """, [group])
+        group_inserted, group_updated = cursor.fetchone()
+        inserted += group_inserted
+        updated += group_updated
+
+    if reassigned:
+        refresh_sales_rollup(cells | sales_rollup_cells(paid_customers))
+
+    return {'inserted': inserted, 'updated': updated}, scope
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from CallCenter_App.models import Lead, PaidCustomer
+from CallCenter_App.utils import backfill_contact_keys
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the normalized contact_key on leads and paid customers that do not have one yet. '
+        'New and edited rows get it on save and migration 0018 fills existing rows; use --all to '
+        'recompute every key after the normalization rules change.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='refresh_all', help='Recompute every key, not only missing ones.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        for model in (Lead, PaidCustomer):
+            count = backfill_contact_keys(model, options['batch_size'], options['refresh_all'])
+            self.stdout.write(self.style.SUCCESS(f'Updated {count} {model._meta.verbose_name_plural} contact keys.'))
+
+        duplicates = Lead.objects.exclude(contact_key='').values('contact_key').annotate(
+            leads=Count('id')
+        ).filter(leads__gt=1).count()
+        if duplicates:
+            self.stdout.write(self.style.WARNING(
+                f'{duplicates} contact numbers are shared by more than one lead (stored in different formats).'
+            ))
@@ -0,0 +1,42 @@
+import time
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from CallCenter_App.views import dashboard_context, dashboard_context_async
+
+
+class Command(BaseCommand):
+    help = 'Times the sync dashboard context against the async one that runs its query groups concurrently.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', action='append', help='User to build the dashboard for. Can be repeated.')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['username']:
+            users = list(User.objects.filter(username__in=options['username']))
+        else:
+            users = [
+                user for user in (
+                    User.objects.filter(is_superuser=True).first(),
+                    User.objects.filter(profile__role='Team Leader').first(),
+                    User.objects.filter(profile__role='Agent').first(),
+                ) if user
+            ]
+
+        iterations = options['iterations']
+        for user in users:
+            role = 'superuser' if user.is_superuser else user.profile.role
+            sync_ms = self.time(lambda: dashboard_context(user), iterations)
+            async_ms = self.time(lambda: async_to_sync(dashboard_context_async)(user), iterations)
+            self.stdout.write(
+                f'{user.username} ({role}): sync {sync_ms:.1f} ms, async {async_ms:.1f} ms, '
+                f'speedup {sync_ms / async_ms:.2f}x'
+            )
+
+    def time(self, build, iterations):
+        build()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            build()
+        return (time.perf_counter() - start) * 1000 / iterations
@@ -0,0 +1,71 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from CallCenter_App.models import Lead
+from CallCenter_App.utils import search_leads
+
+
+class RollbackBenchmark(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Times lead search against a synthetic lead table, with the trigram indexes and with a forced '
+        'sequential scan. The synthetic leads are inserted in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=1000000, help='Number of synthetic leads to insert.')
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--query', action='append', dest='queries', help='Search term to time (repeatable).')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or ['Sharma', 'priya ver', '98765', '9000123456']
+        try:
+            with transaction.atomic():
+                self.insert_leads(options['leads'])
+                for query in queries:
+                    indexed_ms, matches = self.time_search(query, options['iterations'])
+                    seq_scan_ms, _ = self.time_search(query, options['iterations'], seq_scan=True)
+                    self.stdout.write(
+                        f'{query!r}: {matches} matches, trigram index {indexed_ms:.1f} ms, '
+                        f'sequential scan {seq_scan_ms:.1f} ms'
+                    )
+                raise RollbackBenchmark
+        except RollbackBenchmark:
+            self.stdout.write(self.style.SUCCESS('Synthetic leads rolled back.'))
+
+    def insert_leads(self, count):
+        started = time.perf_counter()
+        table = connection.ops.quote_name(Lead._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (full_name, contact_number, contact_key, disposition)
+                SELECT
+                    (ARRAY['Amit', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Anita', 'Rohan', 'Kavita', 'Arjun', 'Meera'])[1 + i %% 10]
+                    || ' ' ||
+                    (ARRAY['Sharma', 'Verma', 'Patel', 'Iyer', 'Khan', 'Reddy', 'Gupta', 'Nair', 'Das', 'Joshi', 'Mehta'])[1 + (i / 10) %% 11]
+                    || ' ' || i,
+                    '9' || lpad(i::text, 9, '0'),
+                    '+919' || lpad(i::text, 9, '0'),
+                    'Fresh'
+                FROM generate_series(1, %s) AS i
+                ON CONFLICT (contact_number) DO NOTHING
+            """, [count])
+            cursor.execute(f'ANALYZE {table}')
+        self.stdout.write(f'Inserted {count} synthetic leads in {time.perf_counter() - started:.1f} s.')
+
+    def time_search(self, query, iterations, seq_scan=False):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL enable_bitmapscan = {'off' if seq_scan else 'on'}")
+            cursor.execute(f"SET LOCAL enable_indexscan = {'off' if seq_scan else 'on'}")
+
+        leads = search_leads(Lead.objects.all(), query)
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            list(leads.order_by('-search_rank', 'id')[:10])
+            matches = leads.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings), matches
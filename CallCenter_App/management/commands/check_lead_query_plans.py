@@ -0,0 +1,19 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the lead list query plan test, which EXPLAINs every query the lead list makes against a '
+        'synthetic lead table in a PostgreSQL test database and fails on a sequential scan of leads. '
+        'Equivalent to `manage.py test CallCenter_App.tests.LeadListQueryPlanTests`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs.')
+
+    def handle(self, *args, **options):
+        call_command(
+            'test', 'CallCenter_App.tests.LeadListQueryPlanTests',
+            keepdb=options['keepdb'], verbosity=options['verbosity'],
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from CallCenter_App.lead_distribution import DISTRIBUTION_STRATEGIES, clean_distribution_options, distribute_leads
+from CallCenter_App.models import Lead, Team
+from CallCenter_App.utils import filter_leads
+
+
+class Command(BaseCommand):
+    help = (
+        "Distributes leads across a team's active agents by round robin, by commitment or by "
+        'open-lead capacity. By default only unassigned leads are distributed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('team', help='Team id or name.')
+        parser.add_argument('--strategy', choices=[value for value, _ in DISTRIBUTION_STRATEGIES], default='round_robin')
+        parser.add_argument('--capacity', type=int, help='Most open leads an agent may hold (capacity strategy).')
+        parser.add_argument('--disposition', help='Only leads with this disposition.')
+        parser.add_argument('--start-date', help='Only leads dated on or after this day, as YYYY-MM-DD.')
+        parser.add_argument('--end-date', help='Only leads dated on or before this day, as YYYY-MM-DD.')
+        parser.add_argument('--include-assigned', action='store_true', help='Also redistribute leads that already have an agent.')
+
+    def handle(self, *args, **options):
+        teams = Team.objects.filter(id=options['team']) if options['team'].isdigit() else Team.objects.filter(name=options['team'])
+        team = teams.first()
+        if team is None:
+            raise CommandError(f"No team {options['team']}.")
+        try:
+            capacity = clean_distribution_options(options['capacity'], options['start_date'], options['end_date'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        leads = filter_leads(Lead.objects.all(), options)
+        if not options['include_assigned']:
+            leads = leads.filter(assigned_to__isnull=True)
+
+        try:
+            shares = distribute_leads(leads, team, options['strategy'], 'distribute_leads', capacity)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for agent, count in shares.items():
+            self.stdout.write(f'{agent.user.get_full_name() or agent.user.username}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Distributed {sum(shares.values())} leads across {len(shares)} agents of {team.name}.'))
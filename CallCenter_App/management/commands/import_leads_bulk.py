@@ -0,0 +1,56 @@
+import os
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from CallCenter_App.lead_import import run_import_job
+from CallCenter_App.models import ImportJob, ImportJobFile, ImportMapping, Lead
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports several lead CSV/XLSX files as one job. The files are parsed and validated in '
+        'parallel (up to LEAD_IMPORT_WORKERS processes) and written by one process, keeping the '
+        'first row of any contact number that repeats across files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='CSV or XLSX files to import, in priority order.')
+        parser.add_argument('--mapping', help='Name of a saved import mapping.')
+        parser.add_argument('--map', action='append', default=[], metavar='FIELD=COLUMN', help='Map a lead field to a column name.')
+        parser.add_argument('--method', choices=[method for method, _ in ImportJob.METHOD_CHOICES], default='bulk')
+
+    def handle(self, *args, **options):
+        for path in options['paths']:
+            if not os.path.isfile(path):
+                raise CommandError(f'{path} does not exist.')
+
+        columns = {}
+        if options['mapping']:
+            try:
+                columns = dict(ImportMapping.objects.get(name=options['mapping']).columns)
+            except ImportMapping.DoesNotExist:
+                raise CommandError(f"No saved mapping named {options['mapping']}.")
+
+        lead_fields = [field.name for field in Lead._meta.concrete_fields if field.editable and not field.primary_key]
+        for entry in options['map']:
+            field, _, column = entry.partition('=')
+            if field not in lead_fields or not column:
+                raise CommandError(f'Invalid --map {entry}; expected one of {", ".join(lead_fields)} as FIELD=COLUMN.')
+            columns[field] = column
+        if 'contact_number' not in columns:
+            raise CommandError('No column is mapped to contact_number; use --mapping or --map contact_number=COLUMN.')
+
+        job = ImportJob.objects.create(
+            original_name=f"{len(options['paths'])} files", mapping=columns, method=options['method'], status='Importing'
+        )
+        for path in options['paths']:
+            import_file = ImportJobFile(job=job, original_name=os.path.basename(path))
+            with open(path, 'rb') as source:
+                import_file.file.save(import_file.original_name, File(source))
+
+        job = run_import_job(job)
+        if job.status != 'Completed':
+            raise CommandError(f'Import failed: {job.error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(options["paths"])} files: {job.inserted_rows} added, {job.updated_rows} updated, '
+            f'{job.rejected_rows} rejected.'
+        ))
@@ -0,0 +1,48 @@
+import os
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from CallCenter_App.lead_import import import_job_header, run_import_job
+from CallCenter_App.models import ImportJob, Lead
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports a lead CSV or XLSX file from disk, by default through the PostgreSQL COPY fast path. Columns are '
+        'matched to lead fields by name unless given with --map field=Column.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import.')
+        parser.add_argument('--map', action='append', default=[], metavar='FIELD=COLUMN', help='Map a lead field to a column of the file.')
+        parser.add_argument('--method', choices=[method for method, _ in ImportJob.METHOD_CHOICES], default='copy')
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['path']):
+            raise CommandError(f"{options['path']} does not exist.")
+
+        lead_fields = [field.name for field in Lead._meta.concrete_fields if field.editable and not field.primary_key]
+        job = ImportJob(original_name=os.path.basename(options['path']), method=options['method'])
+        with open(options['path'], 'rb') as source:
+            job.file.save(job.original_name, File(source))
+
+        header = [column.lower() for column in import_job_header(job)]
+        names = {field: field for field in lead_fields}
+        for entry in options['map']:
+            field, _, column = entry.partition('=')
+            if field not in lead_fields or not column:
+                raise CommandError(f'Invalid --map {entry}; expected one of {", ".join(lead_fields)} as FIELD=COLUMN.')
+            names[field] = column
+
+        job.mapping = {field: header.index(column.lower()) for field, column in names.items() if column.lower() in header}
+        if 'contact_number' not in job.mapping:
+            job.delete()
+            raise CommandError('No column is mapped to contact_number.')
+
+        job.status = 'Importing'
+        job.save()
+        job = run_import_job(job)
+        if job.status != 'Completed':
+            raise CommandError(f'Import failed: {job.error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {job.original_name}: {job.inserted_rows} added, {job.updated_rows} updated, {job.rejected_rows} rejected.'
+        ))
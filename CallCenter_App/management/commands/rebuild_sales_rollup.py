@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from CallCenter_App.utils import rebuild_sales_rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the DailySalesRollup table from all paid customers and invoices.'
+
+    def handle(self, *args, **options):
+        count = rebuild_sales_rollup()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} daily sales rollup rows.'))
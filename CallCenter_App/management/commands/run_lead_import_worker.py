@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from CallCenter_App.lead_import import claim_import_job, expire_uploaded_jobs, run_import_job
+from CallCenter_App.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs queued lead imports in the background, publishing progress to the uploader over '
+        'the channel layer. Several workers can run side by side; each job is claimed by one. '
+        'While idle, uploads left unmapped for LEAD_IMPORT_UPLOAD_EXPIRY seconds are discarded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when no job is queued.')
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs and exit instead of polling.')
+
+    def handle(self, *args, **options):
+        if options['poll_interval'] <= 0:
+            raise CommandError('--poll-interval must be greater than 0.')
+
+        while True:
+            # A long-lived worker outlives its connection when the server drops it or
+            # CONN_MAX_AGE passes; discard such a connection before touching the queue.
+            close_old_connections()
+            try:
+                job = claim_import_job()
+                if job is None:
+                    expired = expire_uploaded_jobs()
+                    if expired:
+                        self.stdout.write(f'Discarded {expired} uploads that were never mapped.')
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'Could not read the import queue: {e}'))
+                job = None
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Importing {job.original_name} (job {job.id})...')
+            try:
+                job = run_import_job(job)
+            except Exception as e:
+                # run_import_job records its own failures; this is a failure to record one, such
+                # as a lost connection, so mark the job failed on a fresh connection if possible.
+                self.stderr.write(self.style.ERROR(f'Job {job.id} stopped: {e}'))
+                close_old_connections()
+                try:
+                    ImportJob.objects.filter(id=job.id, status='Importing').update(
+                        status='Failed', error=str(e), completed_at=timezone.now()
+                    )
+                except Exception:
+                    pass
+                continue
+            if job.status == 'Completed':
+                self.stdout.write(self.style.SUCCESS(
+                    f'Job {job.id}: {job.inserted_rows} added, {job.updated_rows} updated, {job.rejected_rows} rejected.'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'Job {job.id} failed: {job.error}'))
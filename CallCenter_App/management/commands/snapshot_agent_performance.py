@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from CallCenter_App.utils import snapshot_agent_performance
+
+
+class Command(BaseCommand):
+    help = (
+        'Stores month-to-date performance for every agent as of a day (yesterday by default). '
+        'Safe to re-run: existing snapshots for the same day are overwritten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to snapshot, as YYYY-MM-DD.')
+        parser.add_argument('--days', type=int, default=1, help='Number of days to snapshot, ending at --date.')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                end_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format.')
+        else:
+            end_date = timezone.localdate() - timedelta(days=1)
+
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1.')
+
+        for offset in range(options['days'] - 1, -1, -1):
+            snapshot_date = end_date - timedelta(days=offset)
+            count = snapshot_agent_performance(snapshot_date)
+            self.stdout.write(self.style.SUCCESS(f'Stored {count} agent performance snapshots for {snapshot_date}.'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-16 20:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0005_alter_paidcustomer_customer_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('completed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('verified_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('completed_invoices', models.PositiveIntegerField(default=0)),
+                ('completed_customers', models.PositiveIntegerField(default=0)),
+                ('verified_customers', models.PositiveIntegerField(default=0)),
+                ('agent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='CallCenter_App.userprofile')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='CallCenter_App.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['agent', 'date'], name='CallCenter__agent_i_885aaf_idx'), models.Index(fields=['team', 'date'], name='CallCenter__team_id_5f2ee6_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'agent', 'team'), name='unique_daily_sales_rollup'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-16 20:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0006_dailysalesrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentPerformanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('customers', models.PositiveIntegerField(default=0)),
+                ('invoices', models.PositiveIntegerField(default=0)),
+                ('lead_count', models.PositiveIntegerField(default=0)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('half_days', models.PositiveIntegerField(default=0)),
+                ('absent_days', models.PositiveIntegerField(default=0)),
+                ('conversion', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('attendance_percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('commitment', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('achievement', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_snapshots', to='CallCenter_App.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='CallCenter__date_46dbdd_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='agentperformancesnapshot',
+            constraint=models.UniqueConstraint(fields=('agent', 'date'), name='unique_agent_performance_snapshot'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-16 21:15
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0008_lead_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='contact_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='paidcustomer',
+            name='contact_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Reverse('contact_key'), name='text_pattern_ops'), name='lead_contact_key_suffix'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-16 21:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0009_lead_paidcustomer_contact_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lead',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_leads', to='CallCenter_App.userprofile'),
+        ),
+        migrations.AlterField(
+            model_name='lead',
+            name='assigned_to_team',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leads', to='CallCenter_App.team'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to', 'disposition', 'date'], name='lead_agent_disposition_date'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to_team', 'disposition', 'date'], name='lead_team_disposition_date'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to', 'id'], name='lead_agent_id'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to_team', 'id'], name='lead_team_id'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['disposition', 'date'], name='lead_disposition_date'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['date', 'id'], name='lead_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['full_name', 'id'], name='lead_full_name_id'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('disposition', 'Fresh')), fields=['assigned_to', 'id'], name='lead_fresh_agent_id'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('reminder__isnull', False)), fields=['assigned_to', 'reminder'], name='lead_reminder_agent'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0012_importjob_worker_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='method',
+            field=models.CharField(choices=[('bulk', 'Batched insert'), ('copy', 'PostgreSQL COPY')], default='bulk', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0013_importjob_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='rejected_file',
+            field=models.FileField(blank=True, upload_to='lead_imports/rejected/'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0015_bulk_lead_import'),
+    ]
+
+    operations = [
+        # Cells with a NULL agent or team could be inserted twice under the old constraint; the
+        # copies hold the same totals, so keep the first one of each.
+        migrations.RunSQL(
+            '''
+            DELETE FROM "CallCenter_App_dailysalesrollup" AS duplicate
+            USING "CallCenter_App_dailysalesrollup" AS kept
+            WHERE duplicate.id > kept.id
+              AND duplicate.date = kept.date
+              AND duplicate.agent_id IS NOT DISTINCT FROM kept.agent_id
+              AND duplicate.team_id IS NOT DISTINCT FROM kept.team_id
+            ''',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RemoveConstraint(
+            model_name='dailysalesrollup',
+            name='unique_daily_sales_rollup',
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'agent', 'team'), name='unique_daily_sales_rollup', nulls_distinct=False),
+        ),
+    ]
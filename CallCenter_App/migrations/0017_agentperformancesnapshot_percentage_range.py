@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CallCenter_App', '0016_dailysalesrollup_nulls_not_distinct'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentperformancesnapshot',
+            name='achievement',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=19, null=True),
+        ),
+        migrations.AlterField(
+            model_name='agentperformancesnapshot',
+            name='conversion',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        # Snapshots taken without a commitment measured sales against 1.
+        migrations.RunSQL(
+            'UPDATE "CallCenter_App_agentperformancesnapshot" SET achievement = NULL '
+            'WHERE commitment IS NULL OR commitment = 0',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+from CallCenter_App.models import normalize_contact_number
+
+BATCH_SIZE = 2000
+
+
+def backfill_contact_keys(apps, schema_editor):
+    # Rows saved before 0009 have an empty contact_key; walk each table by id and fill it in
+    # batches, committing as it goes so a large table is not held in one transaction.
+    for model_name in ('Lead', 'PaidCustomer'):
+        model = apps.get_model('CallCenter_App', model_name)
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(id__gt=last_id, contact_key='')
+                .only('id', 'contact_number', 'contact_key').order_by('id')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updated = []
+            for row in rows:
+                row.contact_key = normalize_contact_number(row.contact_number)
+                if row.contact_key:
+                    updated.append(row)
+            model.objects.bulk_update(updated, ['contact_key'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('CallCenter_App', '0017_agentperformancesnapshot_percentage_range'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_contact_keys, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,30 @@
+import re
 import uuid
 from uuid import uuid4
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Reverse, Upper
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from decimal import Decimal
 
+CONTACT_COUNTRY_CODE = getattr(settings, 'CONTACT_COUNTRY_CODE', '91')
+
+
+def normalize_contact_number(value):
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    if len(digits) == 10:
+        digits = CONTACT_COUNTRY_CODE + digits
+    return f'+{digits}' if digits else ''
+
 class UserProfile(models.Model):
     STATUS_CHOICES = (
         ('Active', 'Active'),
@@ -87,12 +105,37 @@ class Lead(models.Model):
     contact_number = models.CharField(max_length=15,  unique=True, validators=[RegexValidator(regex=r'^\+?1?\d{9,15}$')])
     state = models.CharField(max_length=100, null=True, blank=True,)
     capital = models.DecimalField(max_digits=10, null=True, blank=True, decimal_places=2)
-    assigned_to = models.ForeignKey(UserProfile, null=True, blank=True, on_delete=models.SET_NULL, related_name='assigned_leads')
-    assigned_to_team = models.ForeignKey(Team, null=True, blank=True, on_delete=models.SET_NULL, related_name='leads')
+    assigned_to = models.ForeignKey(UserProfile, null=True, blank=True, on_delete=models.SET_NULL, related_name='assigned_leads', db_index=False)
+    assigned_to_team = models.ForeignKey(Team, null=True, blank=True, on_delete=models.SET_NULL, related_name='leads', db_index=False)
     disposition = models.CharField(max_length=20, choices=DISPOSITION_CHOICES, default='Fresh', null=True, blank=True,)
     sub_disposition = models.ForeignKey('SubDisposition', on_delete=models.SET_NULL, null=True, related_name='sub_dispositions', default=None)
     remark = models.TextField(blank=True, null=True)
     reminder = models.DateTimeField(null=True, blank=True)
+    contact_key = models.CharField(max_length=16, blank=True, default='', editable=False, db_index=True)
+
+    class Meta:
+        # Trigram indexes on the same UPPER() expressions that icontains lookups generate,
+        # so substring searches on name and number don't scan the whole table. The reversed
+        # contact key serves "number ends with" searches as a prefix match.
+        # The lead list is scoped to an agent or a team, then filtered by disposition and date
+        # or paged in id order; the agent and team composites lead with the foreign key, so the
+        # foreign keys need no index of their own. Check plans with `manage.py check_lead_query_plans`.
+        indexes = [
+            GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='lead_full_name_trgm'),
+            GinIndex(OpClass(Upper('contact_number'), name='gin_trgm_ops'), name='lead_contact_number_trgm'),
+            models.Index(OpClass(Reverse('contact_key'), name='text_pattern_ops'), name='lead_contact_key_suffix'),
+            models.Index(fields=['assigned_to', 'disposition', 'date'], name='lead_agent_disposition_date'),
+            models.Index(fields=['assigned_to_team', 'disposition', 'date'], name='lead_team_disposition_date'),
+            models.Index(fields=['assigned_to', 'id'], name='lead_agent_id'),
+            models.Index(fields=['assigned_to_team', 'id'], name='lead_team_id'),
+            models.Index(fields=['disposition', 'date'], name='lead_disposition_date'),
+            models.Index(fields=['date', 'id'], name='lead_date_id'),
+            models.Index(fields=['full_name', 'id'], name='lead_full_name_id'),
+            models.Index(fields=['assigned_to', 'id'], condition=Q(disposition='Fresh'), name='lead_fresh_agent_id'),
+            models.Index(
+                fields=['assigned_to', 'reminder'], condition=Q(reminder__isnull=False), name='lead_reminder_agent'
+            ),
+        ]
     
     def get_assigned_to_full_name(self):
         if self.assigned_to:
@@ -107,6 +150,7 @@ class Lead(models.Model):
     def save(self, *args, **kwargs):
         if self.sub_disposition is None:
             self.sub_disposition, _ = SubDisposition.objects.get_or_create(name='Fresh')
+        self.contact_key = normalize_contact_number(self.contact_number)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -159,10 +203,12 @@ class PaidCustomer(models.Model):
     verified = models.BooleanField(default=False)
     payment_status = models.CharField(max_length=50, choices=PAYMENT_STATUS_CHOICES)
     remark = models.TextField(blank=True, null=True)
+    contact_key = models.CharField(max_length=16, blank=True, default='', editable=False, db_index=True)
 
     def save(self, *args, **kwargs):
+        self.contact_key = normalize_contact_number(self.contact_number)
         if not self.pk: 
-            existing_customer = PaidCustomer.objects.filter(contact_number=self.contact_number).first()
+            existing_customer = PaidCustomer.objects.filter(contact_key=self.contact_key).first()
             if existing_customer:
                 self.customer_id = existing_customer.customer_id
             else:
@@ -171,10 +217,7 @@ class PaidCustomer(models.Model):
         self.tax_amount = self.amount_paid * Decimal('0.18')
         self.amount_with_gst = self.amount_paid - self.tax_amount
         
-        try:
-            self.lead = Lead.objects.get(contact_number=self.contact_number)
-        except Lead.DoesNotExist:
-            self.lead = None
+        self.lead = Lead.objects.filter(contact_key=self.contact_key).order_by('id').first()
 
         super().save(*args, **kwargs)
 
@@ -184,7 +227,7 @@ class PaidCustomer(models.Model):
 
     @classmethod
     def unique_paid_customers(cls):
-        return cls.objects.order_by('contact_number').distinct('contact_number')
+        return cls.objects.order_by('contact_key').distinct('contact_key')
 
     def __str__(self):
         return f"PaidCustomer {self.lead.full_name if self.lead else 'Unknown'} ({self.customer_id})"
@@ -380,3 +423,125 @@ class Complaint(models.Model):
             self.resolved_at = timezone.now()
         super().save(*args, **kwargs)
 
+
+
+class DailySalesRollup(models.Model):
+    date = models.DateField()
+    agent = models.ForeignKey(UserProfile, null=True, blank=True, on_delete=models.CASCADE, related_name='sales_rollups')
+    team = models.ForeignKey(Team, null=True, blank=True, on_delete=models.CASCADE, related_name='sales_rollups')
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    verified_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    completed_invoices = models.PositiveIntegerField(default=0)
+    completed_customers = models.PositiveIntegerField(default=0)
+    verified_customers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'agent', 'team'], name='unique_daily_sales_rollup', nulls_distinct=False
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['agent', 'date']),
+            models.Index(fields=['team', 'date']),
+        ]
+
+    def __str__(self):
+        return f"Sales rollup {self.date} - {self.agent or 'Unassigned'} / {self.team or 'No team'}"
+
+
+class AgentPerformanceSnapshot(models.Model):
+    # Month-to-date figures for one agent as they stood at the end of `date`; the last
+    # snapshot of a month is that month's record.
+    date = models.DateField()
+    agent = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='performance_snapshots')
+    sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    customers = models.PositiveIntegerField(default=0)
+    invoices = models.PositiveIntegerField(default=0)
+    lead_count = models.PositiveIntegerField(default=0)
+    present_days = models.PositiveIntegerField(default=0)
+    half_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    # Customers can outnumber the leads still assigned, and sales can dwarf a small commitment, so
+    # both percentages are sized for their integer inputs rather than for 0-100.
+    conversion = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    commitment = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    # NULL when the agent has no commitment to measure against.
+    achievement = models.DecimalField(max_digits=19, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['agent', 'date'], name='unique_agent_performance_snapshot'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"Performance snapshot {self.date} - {self.agent}"
+
+
+class ImportJob(models.Model):
+    # A lead upload staged on disk under MEDIA_ROOT; the session only carries the job id.
+    # Once mapped, the job is queued and `manage.py run_lead_import_worker` streams the file
+    # into the lead table, keeping the row counts below current as it goes. Rows that fail
+    # validation are collected in `rejected_file` for the uploader to download. A bulk import
+    # stages several ImportJobFile rows instead of `file`, and its mapping names columns
+    # rather than giving their positions.
+    STATUS_CHOICES = (
+        ('Uploaded', 'Uploaded'),
+        ('Queued', 'Queued'),
+        ('Importing', 'Importing'),
+        ('Completed', 'Completed'),
+        ('Failed', 'Failed'),
+    )
+    METHOD_CHOICES = (
+        ('bulk', 'Batched insert'),
+        ('copy', 'PostgreSQL COPY'),
+    )
+
+    uploaded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='import_jobs')
+    file = models.FileField(upload_to='lead_imports/', blank=True)
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Uploaded')
+    mapping = models.JSONField(default=dict, blank=True)
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES, default='bulk')
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    inserted_rows = models.PositiveIntegerField(default=0)
+    updated_rows = models.PositiveIntegerField(default=0)
+    rejected_rows = models.PositiveIntegerField(default=0)
+    rejected_file = models.FileField(upload_to='lead_imports/rejected/', blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Import {self.original_name} ({self.status})"
+
+
+class ImportJobFile(models.Model):
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='files')
+    file = models.FileField(upload_to='lead_imports/')
+    original_name = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f"{self.original_name} in {self.job}"
+
+
+class ImportMapping(models.Model):
+    # A saved lead-field to column-name mapping, reused for bulk imports of vendor files
+    # that share a layout.
+    name = models.CharField(max_length=100, unique=True)
+    columns = models.JSONField(default=dict)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='import_mappings')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
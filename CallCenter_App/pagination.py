@@ -0,0 +1,261 @@
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from django.utils.http import urlencode
+
+CURSOR_SALT = 'keyset-pagination'
+PAGINATOR_COUNT_TIMEOUT = getattr(settings, 'PAGINATOR_COUNT_TIMEOUT', 60)
+PAGINATOR_ESTIMATE_THRESHOLD = getattr(settings, 'PAGINATOR_ESTIMATE_THRESHOLD', 50000)
+
+
+def keyset_fields(model, ordering):
+    fields = []
+    for field in ordering:
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        if name in ('id', 'pk'):
+            fields.append(('pk', descending, False))
+            break
+        fields.append((name, descending, keyset_field_nullable(model, name)))
+    if not fields or fields[-1][0] != 'pk':
+        fields.append(('pk', fields[-1][1] if fields else False, False))
+    return fields
+
+
+def keyset_field_nullable(model, name):
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        return True
+
+
+def keyset_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class EstimatedCountPaginator(Paginator):
+    # Above PAGINATOR_ESTIMATE_THRESHOLD rows the planner's estimate is used instead of COUNT(*);
+    # smaller results are counted exactly. Either way the count is cached per query for a short time.
+    count_estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+
+        connection = connections[queryset.db]
+        try:
+            sql, params = queryset.order_by().values('pk').query.get_compiler(queryset.db).as_sql()
+        except EmptyResultSet:
+            return 0
+        signature = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+        key = f'paginator:count:{signature}'
+
+        cached = cache.get(key)
+        if cached is not None:
+            self.count_estimated = cached['estimated']
+            return cached['count']
+
+        estimate = self.estimate_count(connection, queryset, sql, params)
+        if estimate is not None and estimate > PAGINATOR_ESTIMATE_THRESHOLD:
+            count, self.count_estimated = estimate, True
+        else:
+            count = queryset.count()
+        cache.set(key, {'count': count, 'estimated': self.count_estimated}, PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+    def estimate_count(self, connection, queryset, sql, params):
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+                if row and row[0] >= 0:
+                    return row[0]
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor=None, previous_cursor=None, last_cursor=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = last_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    # Seeks past the last row shown instead of using OFFSET, so page 5,000 costs the same as page 1.
+    # Rows are ordered by the queryset's ordering with the primary key as tiebreaker, following
+    # PostgreSQL's default NULL placement (last when ascending, first when descending).
+
+    def __init__(self, queryset, per_page):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        self.fields = keyset_fields(queryset.model, ordering)
+        self.ordering = [f"{'-' if descending else ''}{name}" for name, descending, _ in self.fields]
+        self.per_page = int(per_page)
+        self.queryset = queryset.annotate(**{
+            f'keyset_{index}': F(name) for index, (name, _, _) in enumerate(self.fields)
+        })
+
+    def ordered(self, reverse=False):
+        return self.queryset.order_by(*[
+            f"{'-' if descending != reverse else ''}{name}" for name, descending, _ in self.fields
+        ])
+
+    def seek(self, values, reverse=False):
+        condition = None
+        equal = Q()
+        for (name, descending, nullable), value in zip(self.fields, values):
+            descending = descending != reverse
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if descending else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                if nullable and not descending:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if after is not None:
+                condition = equal & after if condition is None else condition | (equal & after)
+            equal &= same
+        return condition if condition is not None else Q(pk__in=[])
+
+    def encode(self, direction, obj=None):
+        values = [keyset_value(getattr(obj, f'keyset_{index}')) for index in range(len(self.fields))] if obj else []
+        return signing.dumps({'d': direction, 'o': self.ordering, 'k': values}, salt=CURSOR_SALT, compress=True)
+
+    def decode(self, cursor):
+        # A cursor only applies to the ordering it was issued for; one from another sort, or whose
+        # values no longer fit the fields, starts again from the first page.
+        if not cursor:
+            return None, []
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None, []
+        if not isinstance(payload, dict) or payload.get('o') != self.ordering:
+            return None, []
+        direction, values = payload.get('d'), payload.get('k') or []
+        if direction == 'last':
+            return direction, []
+        if direction in ('next', 'previous') and isinstance(values, list) and len(values) == len(self.fields):
+            try:
+                return direction, self.coerce(values)
+            except (TypeError, ValueError, ValidationError):
+                pass
+        return None, []
+
+    def coerce(self, values):
+        annotations = self.queryset.query.annotations
+        return [
+            None if value is None else annotations[f'keyset_{index}'].output_field.to_python(value)
+            for index, value in enumerate(values)
+        ]
+
+    def page(self, cursor=None):
+        direction, values = self.decode(cursor)
+        if direction in ('previous', 'last'):
+            queryset = self.ordered(reverse=True)
+            if direction == 'previous':
+                queryset = queryset.filter(self.seek(values, reverse=True))
+            rows = list(queryset[:self.per_page + 1])
+            if not rows and direction == 'previous':
+                return self.page()
+            return self.build_page(rows[:self.per_page][::-1], has_next=direction == 'previous', has_previous=len(rows) > self.per_page)
+
+        queryset = self.ordered()
+        if direction == 'next':
+            queryset = queryset.filter(self.seek(values))
+        rows = list(queryset[:self.per_page + 1])
+        if not rows and direction == 'next':
+            return self.page(self.encode('last'))
+        return self.build_page(rows[:self.per_page], has_next=len(rows) > self.per_page, has_previous=direction == 'next')
+
+    def build_page(self, rows, has_next, has_previous):
+        return KeysetPage(
+            rows,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self.encode('next', rows[-1]) if has_next and rows else None,
+            previous_cursor=self.encode('previous', rows[0]) if has_previous and rows else None,
+            last_cursor=self.encode('last'),
+        )
+
+
+def paginate(request, queryset, per_page=10, cursor_param='cursor', page_param='page', paginator_class=Paginator):
+    paginator = KeysetPaginator(queryset, per_page)
+    cursor = request.GET.get(cursor_param)
+    page_number = request.GET.get(page_param)
+
+    if page_number and not cursor:
+        # Numbered links from before cursors existed still work; navigating on from them uses cursors.
+        numbered = paginator_class(paginator.ordered(), per_page)
+        try:
+            numbered_page = numbered.page(page_number)
+        except PageNotAnInteger:
+            numbered_page = numbered.page(1)
+        except EmptyPage:
+            numbered_page = numbered.page(numbered.num_pages)
+        page = paginator.build_page(
+            list(numbered_page.object_list), numbered_page.has_next(), numbered_page.has_previous()
+        )
+    else:
+        page = paginator.page(cursor)
+
+    params = request.GET.copy()
+    params.pop(cursor_param, None)
+    params.pop(page_param, None)
+    page.first_url = f'?{params.urlencode()}'
+    page.previous_url = cursor_url(params, cursor_param, page.previous_cursor)
+    page.next_url = cursor_url(params, cursor_param, page.next_cursor)
+    page.last_url = cursor_url(params, cursor_param, page.last_cursor)
+    return page
+
+
+def cursor_url(params, cursor_param, cursor):
+    if not cursor:
+        return None
+    query = params.urlencode()
+    return f"?{query}{'&' if query else ''}{urlencode({cursor_param: cursor})}"
@@ -1,9 +1,10 @@
 from django.urls import re_path
-from .consumers import UserBreakConsumer, AllBreaksConsumer
+from .consumers import UserBreakConsumer, AllBreaksConsumer, LeadImportProgressConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/break-monitor/(?P<user_id>\d+)/$', UserBreakConsumer.as_asgi()),
     re_path(r'ws/break-monitor/all/$', AllBreaksConsumer.as_asgi()),
+    re_path(r'ws/lead-import/(?P<job_id>\d+)/$', LeadImportProgressConsumer.as_asgi()),
 
 ]
 
@@ -0,0 +1,94 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Lead, PaidCustomer, Invoice, Attendance
+from .utils import sales_rollup_cells, refresh_sales_rollup
+from .dashboard_cache import invalidate_dashboard_cache
+
+
+@receiver(pre_save, sender=PaidCustomer)
+@receiver(pre_delete, sender=PaidCustomer)
+def remember_paid_customer_rollup_cells(sender, instance, **kwargs):
+    instance._rollup_cells = sales_rollup_cells(PaidCustomer.objects.filter(pk=instance.pk)) if instance.pk else set()
+
+
+@receiver(post_save, sender=PaidCustomer)
+def update_paid_customer_rollup(sender, instance, **kwargs):
+    instance._rollup_cells = getattr(instance, '_rollup_cells', set()) | sales_rollup_cells(PaidCustomer.objects.filter(pk=instance.pk))
+    refresh_sales_rollup(instance._rollup_cells)
+
+
+@receiver(post_delete, sender=PaidCustomer)
+def remove_paid_customer_rollup(sender, instance, **kwargs):
+    refresh_sales_rollup(getattr(instance, '_rollup_cells', set()))
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def update_invoice_rollup(sender, instance, **kwargs):
+    instance._rollup_cells = sales_rollup_cells(PaidCustomer.objects.filter(pk=instance.customer_id))
+    refresh_sales_rollup(instance._rollup_cells)
+
+
+@receiver(pre_save, sender=Lead)
+def remember_lead_rollup_cells(sender, instance, **kwargs):
+    instance._rollup_cells = sales_rollup_cells(PaidCustomer.objects.filter(lead_id=instance.pk)) if instance.pk else set()
+
+
+@receiver(post_save, sender=Lead)
+def update_lead_rollup(sender, instance, created, **kwargs):
+    if created:
+        return
+    cells = sales_rollup_cells(PaidCustomer.objects.filter(lead_id=instance.pk))
+    old_cells = getattr(instance, '_rollup_cells', set())
+    if cells != old_cells:
+        refresh_sales_rollup(cells | old_cells)
+
+
+@receiver(pre_delete, sender=Lead)
+def remember_deleted_lead_rollup_cells(sender, instance, **kwargs):
+    cells = sales_rollup_cells(PaidCustomer.objects.filter(lead_id=instance.pk))
+    # Paid customers stay behind with lead set to NULL, so their sales move to the unassigned cell.
+    instance._rollup_cells = cells | {(payment_date, None, None) for payment_date, _, _ in cells}
+
+
+@receiver(post_delete, sender=Lead)
+def update_deleted_lead_rollup(sender, instance, **kwargs):
+    refresh_sales_rollup(getattr(instance, '_rollup_cells', set()))
+
+
+# Cache receivers are registered after the rollup receivers so the rollup is already
+# refreshed by the time the cached dashboards are dropped.
+def rollup_scope(cells):
+    return {agent_id for _, agent_id, _ in cells}, {team_id for _, _, team_id in cells}
+
+
+@receiver(post_save, sender=PaidCustomer)
+@receiver(post_delete, sender=PaidCustomer)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invalidate_sales_dashboards(sender, instance, **kwargs):
+    agent_ids, team_ids = rollup_scope(getattr(instance, '_rollup_cells', set()))
+    invalidate_dashboard_cache(agent_ids, team_ids)
+
+
+@receiver(pre_save, sender=Lead)
+def remember_lead_dashboard_scope(sender, instance, **kwargs):
+    instance._dashboard_scope = Lead.objects.filter(pk=instance.pk).values_list('assigned_to', 'assigned_to_team').first() if instance.pk else None
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def invalidate_lead_dashboards(sender, instance, **kwargs):
+    agent_ids = {instance.assigned_to_id}
+    team_ids = {instance.assigned_to_team_id}
+    old_scope = getattr(instance, '_dashboard_scope', None)
+    if old_scope:
+        agent_ids.add(old_scope[0])
+        team_ids.add(old_scope[1])
+    invalidate_dashboard_cache(agent_ids, team_ids)
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_attendance_dashboards(sender, instance, **kwargs):
+    invalidate_dashboard_cache(agent_ids=[instance.user_id])
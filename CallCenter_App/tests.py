@@ -1,3 +1,143 @@
-from django.test import TestCase
+import html
+import io
+import re
+import unittest
+from datetime import timedelta
+from urllib.parse import parse_qsl
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .lead_import import copy_import_leads, import_leads
+from .models import Lead, SubDisposition, Team, UserProfile
+from .views import lead_list
 
-# Create your tests here.
+LEAD_LIST_FILTERS = [
+    {},
+    {'disposition': 'Fresh'},
+    {'disposition': 'Connected', 'start_date': '{recent}'},
+    {'start_date': '{recent}', 'end_date': '{today}'},
+    {'sub_disposition': 'Fresh'},
+    {'sort': 'date'},
+    {'sort': 'full_name'},
+    {'search': 'Sharma 12'},
+    {'search': '0012345'},
+]
+
+NEXT_PAGE_RE = re.compile(r'href="(\?[^"]*cursor=[^"]*)"')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are checked against PostgreSQL.')
+class LeadListQueryPlanTests(TestCase):
+    # Runs the lead list as a superuser, a team leader and an agent against a synthetic lead table
+    # and EXPLAINs every query it makes on leads, including the second page reached by cursor.
+    lead_count = 200000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser('plan-admin', password='plan-admin')
+        leader = UserProfile.objects.create(user=User.objects.create_user('plan-leader'), role='Team Leader')
+        agents = [
+            UserProfile.objects.create(user=User.objects.create_user(f'plan-agent-{number}'), role='Agent')
+            for number in range(10)
+        ]
+        teams = [Team.objects.create(name=f'Plan team {number}', leader=leader) for number in range(2)]
+        for index, agent in enumerate(agents):
+            teams[index % len(teams)].agents.add(agent)
+        cls.leader, cls.agent = leader.user, agents[0].user
+
+        # A handful of sub dispositions would each cover most of the table, where a sequential
+        # scan is the right plan; spread the synthetic leads the way a live system would.
+        SubDisposition.objects.create(name='Fresh')
+        SubDisposition.objects.bulk_create(SubDisposition(name=f'Synthetic {number}') for number in range(11))
+        cls.insert_leads(
+            [agent.id for agent in agents],
+            [teams[index % len(teams)].id for index in range(len(agents))],
+            list(SubDisposition.objects.values_list('id', flat=True)),
+        )
+
+    @classmethod
+    def insert_leads(cls, agent_ids, team_ids, sub_disposition_ids):
+        table = connection.ops.quote_name(Lead._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (
+                    full_name, contact_number, contact_key, disposition, date, reminder,
+                    assigned_to_id, assigned_to_team_id, sub_disposition_id
+                )
+                SELECT
+                    (ARRAY['Amit', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Anita', 'Rohan', 'Kavita', 'Arjun', 'Meera'])[1 + i %% 10]
+                    || ' ' ||
+                    (ARRAY['Sharma', 'Verma', 'Patel', 'Iyer', 'Khan', 'Reddy', 'Gupta', 'Nair', 'Das', 'Joshi', 'Mehta'])[1 + (i / 10) %% 11]
+                    || ' ' || i,
+                    '7' || lpad(i::text, 9, '0'),
+                    '+917' || lpad(i::text, 9, '0'),
+                    (ARRAY['Fresh', 'Connected', 'Not connected'])[1 + i %% 3],
+                    CURRENT_DATE - (i %% 730),
+                    CASE WHEN i %% 20 = 0 THEN now() + (i %% 72) * interval '1 hour' END,
+                    CASE WHEN i %% 10 = 0 THEN NULL ELSE (%s::bigint[])[1 + i %% %s] END,
+                    CASE WHEN i %% 10 = 0 THEN NULL ELSE (%s::bigint[])[1 + i %% %s] END,
+                    (%s::bigint[])[1 + i %% %s]
+                FROM generate_series(1, %s) AS i
+            """, [
+                agent_ids, len(agent_ids), team_ids, len(team_ids),
+                sub_disposition_ids, len(sub_disposition_ids), cls.lead_count,
+            ])
+            cursor.execute(f'ANALYZE {table}')
+
+    def lead_list_queries(self, user, params):
+        factory = RequestFactory()
+        request = factory.get('/leads/', params)
+        request.user = user
+        with CaptureQueriesContext(connection) as context:
+            response = lead_list(request)
+        queries = list(context.captured_queries)
+
+        next_page = NEXT_PAGE_RE.search(response.content.decode())
+        if next_page:
+            request = factory.get('/leads/', dict(parse_qsl(html.unescape(next_page.group(1))[1:])))
+            request.user = user
+            with CaptureQueriesContext(connection) as context:
+                lead_list(request)
+            queries += context.captured_queries
+        return queries
+
+    def test_lead_list_never_seq_scans_leads(self):
+        table = connection.ops.quote_name(Lead._meta.db_table)
+        today = timezone.localdate()
+        dates = {'today': today.isoformat(), 'recent': (today - timedelta(days=30)).isoformat()}
+
+        for user in (self.superuser, self.leader, self.agent):
+            for filters in LEAD_LIST_FILTERS:
+                params = {key: value.format(**dates) for key, value in filters.items()}
+                with self.subTest(user=user.username, **params):
+                    checked = 0
+                    with connection.cursor() as cursor:
+                        for query in self.lead_list_queries(user, params):
+                            sql = query['sql']
+                            if not sql.startswith('SELECT') or table not in sql:
+                                continue
+                            checked += 1
+                            cursor.execute(f'EXPLAIN {sql}')
+                            plan = '\n'.join(row[0] for row in cursor.fetchall())
+                            self.assertNotIn(f'Seq Scan on {table}', plan, f'{sql}\n{plan}')
+                    self.assertTrue(checked)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'The COPY import path needs PostgreSQL.')
+class LeadImportPathTests(TestCase):
+    def test_copy_and_batched_imports_store_the_same_reminder(self):
+        row = {'full_name': 'Priya Sharma', 'reminder': '2024-05-01 10:30:00'}
+        import_leads([{**row, 'contact_number': '9876543210'}])
+        stats = {'rejected': 0}
+        copy_import_leads(
+            [({'row': 2}, {**row, 'contact_number': '9876543211'})], stats, io.StringIO(),
+            ['row', 'full_name', 'reminder', 'contact_number', 'errors'],
+        )
+
+        batched = Lead.objects.get(contact_number='9876543210')
+        copied = Lead.objects.get(contact_number='9876543211')
+        self.assertEqual(stats['rejected'], 0)
+        self.assertEqual(copied.reminder, batched.reminder)
+        self.assertEqual(timezone.localtime(copied.reminder).hour, 10)
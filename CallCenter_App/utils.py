@@ -1,4 +1,24 @@
-from .models import LeadHistory,AgentSalesHistory
+import re
+import tempfile
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from django.db import transaction
+from django.http import FileResponse
+from django.utils import timezone
+from django.db.models import (
+    Sum, Count, Max, Q, F, Case, When, Value, OuterRef, Subquery, Window, FilteredRelation, DecimalField,
+    CharField, IntegerField, FloatField
+)
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models.functions import Coalesce, Concat, Greatest, Reverse, Round, RowNumber, Trim
+from .models import (
+    LeadHistory, AgentSalesHistory, PaidCustomer, Invoice, DailySalesRollup, Lead, Attendance, Team, UserProfile,
+    AgentPerformanceSnapshot, LeadTransferRecord, SubDisposition, normalize_contact_number
+)
+from .dashboard_cache import invalidate_dashboard_cache
+
+CONTACT_QUERY_RE = re.compile(r'[\d\s()+-]+')
 
 def record_action(lead, action, performed_by, details=None, notes=None):
     LeadHistory.objects.create(
@@ -9,9 +29,488 @@ def record_action(lead, action, performed_by, details=None, notes=None):
         notes=notes
     )
 
+def record_actions(lead_ids, action, performed_by, details=None, notes=None):
+    LeadHistory.objects.bulk_create([
+        LeadHistory(lead_id=lead_id, action=action, performed_by=performed_by, details=details, notes=notes)
+        for lead_id in lead_ids
+    ], batch_size=2000)
+
+def reassign_leads(leads, assignment, action, performed_by, details, notes=None, transferred_by=None, transferred_to=None):
+    # Moves a whole selection with one UPDATE and writes its history (and, for transfers, its
+    # transfer records) with bulk inserts, all in one transaction. QuerySet.update skips the
+    # Lead signals, so the sales rollup and cached dashboards are refreshed here instead.
+    with transaction.atomic():
+        selected = list(leads.select_for_update().values_list(
+            'id', 'assigned_to', 'assigned_to_team', 'disposition', 'sub_disposition'
+        ))
+        lead_ids = [lead_id for lead_id, *_ in selected]
+        paid_customers = PaidCustomer.objects.filter(lead_id__in=lead_ids)
+        rollup_cells = sales_rollup_cells(paid_customers)
+
+        Lead.objects.filter(id__in=lead_ids).update(**assignment)
+        refresh_sales_rollup(rollup_cells | sales_rollup_cells(paid_customers))
+
+        record_actions(lead_ids, action, performed_by, details, notes)
+        if transferred_by:
+            LeadTransferRecord.objects.bulk_create([
+                LeadTransferRecord(
+                    lead_id=lead_id,
+                    from_user=transferred_by,
+                    to_user=transferred_to,
+                    transfer_remark=notes,
+                    disposition=disposition,
+                    sub_disposition_id=sub_disposition_id
+                )
+                for lead_id, _, _, disposition, sub_disposition_id in selected
+            ], batch_size=2000)
+
+    agent_ids = {agent_id for _, agent_id, _, _, _ in selected}
+    team_ids = {team_id for _, _, team_id, _, _ in selected}
+    if 'assigned_to' in assignment:
+        agent_ids.add(getattr(assignment['assigned_to'], 'id', None))
+    if 'assigned_to_team' in assignment:
+        team_ids.add(getattr(assignment['assigned_to_team'], 'id', None))
+    invalidate_dashboard_cache(agent_ids, team_ids)
+    return len(lead_ids)
+
 def record_agent_sales_history(agent, commitment, updated_by):
     AgentSalesHistory.objects.create(
         agent=agent,
         commitment=commitment,
         updated_by=updated_by
     )
+
+def daily_sales_series(rollups, start_date, end_date, revenue_field='verified_revenue'):
+    # One GROUP BY date for the whole range; days without sales are filled with 0 here.
+    daily_totals = dict(
+        rollups.filter(date__range=[start_date, end_date])
+        .order_by()
+        .values('date')
+        .annotate(total_sales=Sum(revenue_field))
+        .values_list('date', 'total_sales')
+    )
+
+    sales_data = []
+    labels = []
+    current_date = start_date
+    while current_date <= end_date:
+        sales_data.append(float(daily_totals.get(current_date) or 0))
+        labels.append(current_date.strftime('%Y-%m-%d'))
+        current_date += timedelta(days=1)
+    return sales_data, labels
+
+def attendance_counts(attendances):
+    counts = attendances.aggregate(
+        total_attendances=Count('id'),
+        total_present=Count('id', filter=Q(status='Present')),
+        total_absent=Count('id', filter=Q(status='Absent')),
+        total_half_day=Count('id', filter=Q(status='Half day')),
+    )
+    if counts['total_attendances'] > 0:
+        counts['attendance_rate'] = ((counts['total_present'] + counts['total_half_day']) / counts['total_attendances']) * 100
+    else:
+        counts['attendance_rate'] = 0
+    return counts
+
+def payment_status_counts(paid_customers, distinct_contacts=False):
+    field = 'contact_key' if distinct_contacts else 'id'
+    return paid_customers.aggregate(
+        total=Count(field, distinct=distinct_contacts),
+        pending=Count(field, distinct=distinct_contacts, filter=Q(payment_status='pending')),
+        completed=Count(field, distinct=distinct_contacts, filter=Q(payment_status='completed')),
+        failed=Count(field, distinct=distinct_contacts, filter=Q(payment_status='failed')),
+    )
+
+def disposition_counts(leads):
+    return leads.aggregate(
+        total=Count('id'),
+        fresh=Count('id', filter=Q(disposition='Fresh')),
+        connected=Count('id', filter=Q(disposition='Connected')),
+        not_connected=Count('id', filter=Q(disposition='Not connected')),
+    )
+
+def sales_rollup_totals(rollups, today, revenue_field='verified_revenue'):
+    start_of_month = today.replace(day=1)
+    last_month_end = start_of_month - timedelta(days=1)
+    last_month_start = last_month_end.replace(day=1)
+
+    # Customer counts for a period add up the per-day distinct counts stored in the rollup.
+    totals = rollups.aggregate(
+        amount_paid=Sum(revenue_field),
+        today_sales_amount=Sum(revenue_field, filter=Q(date=today)),
+        this_month_sales_amount=Sum(revenue_field, filter=Q(date__gte=start_of_month)),
+        unique_customers_today=Sum('verified_customers', filter=Q(date=today)),
+        unique_customers_this_month=Sum('verified_customers', filter=Q(date__gte=start_of_month)),
+        unique_customers_last_month=Sum('verified_customers', filter=Q(date__range=[last_month_start, last_month_end])),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+def sales_rollup_cells(paid_customers):
+    return set(paid_customers.values_list('payment_date', 'lead__assigned_to', 'lead__assigned_to_team'))
+
+def refresh_sales_rollup(cells):
+    # Recomputes only the (date, agent, team) cells touched by a write, so the cost of a
+    # refresh does not depend on how many invoices exist overall.
+    for payment_date, agent_id, team_id in cells:
+        customers = PaidCustomer.objects.filter(
+            payment_date=payment_date,
+            lead__assigned_to=agent_id,
+            lead__assigned_to_team=team_id
+        )
+        customer_totals = customers.aggregate(
+            completed_customers=Count('id', filter=Q(payment_status='completed')),
+            verified_customers=Count('contact_number', distinct=True, filter=Q(payment_status='completed', verified=True)),
+        )
+        invoice_totals = Invoice.objects.filter(customer__in=customers, customer__payment_status='completed').aggregate(
+            completed_revenue=Sum('customer__amount_with_gst'),
+            verified_revenue=Sum('customer__amount_with_gst', filter=Q(customer__verified=True)),
+            completed_invoices=Count('id'),
+        )
+        values = {
+            'completed_revenue': invoice_totals['completed_revenue'] or 0,
+            'verified_revenue': invoice_totals['verified_revenue'] or 0,
+            'completed_invoices': invoice_totals['completed_invoices'],
+            'completed_customers': customer_totals['completed_customers'],
+            'verified_customers': customer_totals['verified_customers'],
+        }
+
+        # An upsert on the unique cell, which treats NULL agents and teams as equal, so two
+        # writers refreshing the same missing cell cannot both insert it.
+        if not any(values.values()):
+            DailySalesRollup.objects.filter(date=payment_date, agent_id=agent_id, team_id=team_id).delete()
+        else:
+            DailySalesRollup.objects.bulk_create(
+                [DailySalesRollup(date=payment_date, agent_id=agent_id, team_id=team_id, **values)],
+                update_conflicts=True, unique_fields=['date', 'agent', 'team'], update_fields=list(values)
+            )
+
+def rebuild_sales_rollup():
+    cells = {}
+    empty = {
+        'completed_revenue': 0, 'verified_revenue': 0, 'completed_invoices': 0,
+        'completed_customers': 0, 'verified_customers': 0,
+    }
+
+    customer_totals = PaidCustomer.objects.order_by().values(
+        'payment_date', 'lead__assigned_to', 'lead__assigned_to_team'
+    ).annotate(
+        completed_customers=Count('id', filter=Q(payment_status='completed')),
+        verified_customers=Count('contact_number', distinct=True, filter=Q(payment_status='completed', verified=True)),
+    )
+    for row in customer_totals:
+        key = (row['payment_date'], row['lead__assigned_to'], row['lead__assigned_to_team'])
+        cells.setdefault(key, dict(empty)).update(
+            completed_customers=row['completed_customers'],
+            verified_customers=row['verified_customers'],
+        )
+
+    invoice_totals = Invoice.objects.filter(customer__payment_status='completed').order_by().values(
+        'customer__payment_date', 'customer__lead__assigned_to', 'customer__lead__assigned_to_team'
+    ).annotate(
+        completed_revenue=Sum('customer__amount_with_gst'),
+        verified_revenue=Sum('customer__amount_with_gst', filter=Q(customer__verified=True)),
+        completed_invoices=Count('id'),
+    )
+    for row in invoice_totals:
+        key = (row['customer__payment_date'], row['customer__lead__assigned_to'], row['customer__lead__assigned_to_team'])
+        cells.setdefault(key, dict(empty)).update(
+            completed_revenue=row['completed_revenue'] or 0,
+            verified_revenue=row['verified_revenue'] or 0,
+            completed_invoices=row['completed_invoices'],
+        )
+
+    rollups = [
+        DailySalesRollup(date=payment_date, agent_id=agent_id, team_id=team_id, **values)
+        for (payment_date, agent_id, team_id), values in cells.items()
+        if any(values.values())
+    ]
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        DailySalesRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+def agent_subquery(queryset, field, aggregate, output_field):
+    # Correlated per-agent aggregate, so the leaderboard never needs a query per agent.
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+            .annotate(total=aggregate).values('total')[:1],
+            output_field=output_field
+        ),
+        Value(0),
+        output_field=output_field
+    )
+
+def rank_leaderboard(leaderboard):
+    first_team_leader = Team.objects.filter(agents=OuterRef('pk')).order_by('pk').annotate(
+        leader_name=Trim(Concat('leader__user__first_name', Value(' '), 'leader__user__last_name'))
+    ).values('leader_name')[:1]
+
+    return leaderboard.select_related('user').annotate(
+        team_leader=Coalesce(Subquery(first_team_leader, output_field=CharField()), Value('N/A')),
+        rank=Window(RowNumber(), order_by=[F('achievements').desc(nulls_last=True), F('pk').asc()]),
+    ).order_by(F('achievements').desc(nulls_last=True), 'pk')
+
+def sales_leaderboard(agents):
+    money = DecimalField(max_digits=14, decimal_places=2)
+    total_sales = agent_subquery(DailySalesRollup.objects.all(), 'agent', Sum('completed_revenue'), money)
+    commitment = Case(
+        When(Q(commitment__isnull=True) | Q(commitment=0), then=Value(1)),
+        default=F('commitment'),
+        output_field=money
+    )
+
+    return rank_leaderboard(UserProfile.objects.filter(pk__in=agents.values('pk')).annotate(
+        total_sales=total_sales,
+        number_of_customers=agent_subquery(DailySalesRollup.objects.all(), 'agent', Sum('completed_customers'), IntegerField()),
+        total_invoice_generated=agent_subquery(DailySalesRollup.objects.all(), 'agent', Sum('completed_invoices'), IntegerField()),
+        lead_count=agent_subquery(Lead.objects.all(), 'assigned_to', Count('id'), IntegerField()),
+        total_days=agent_subquery(Attendance.objects.all(), 'user', Count('id'), IntegerField()),
+        present_days=agent_subquery(Attendance.objects.filter(status='Present'), 'user', Count('id'), IntegerField()),
+        half_day_days=agent_subquery(Attendance.objects.filter(status='Half day'), 'user', Count('id'), IntegerField()),
+        sales_commitment=F('commitment'),
+        achievements=Round(total_sales * 100 / commitment, 2, output_field=money),
+    ))
+
+def snapshot_leaderboard(agents, snapshot_date):
+    return rank_leaderboard(UserProfile.objects.filter(pk__in=agents.values('pk')).annotate(
+        snapshot=FilteredRelation('performance_snapshots', condition=Q(performance_snapshots__date=snapshot_date)),
+    ).filter(snapshot__isnull=False).annotate(
+        total_sales=F('snapshot__sales'),
+        number_of_customers=F('snapshot__customers'),
+        total_invoice_generated=F('snapshot__invoices'),
+        lead_count=F('snapshot__lead_count'),
+        total_days=F('snapshot__present_days') + F('snapshot__half_days') + F('snapshot__absent_days'),
+        present_days=F('snapshot__present_days'),
+        half_day_days=F('snapshot__half_days'),
+        sales_commitment=F('snapshot__commitment'),
+        achievements=F('snapshot__achievement'),
+    ))
+
+def sales_summary_row(agent):
+    conversion_rate = (agent.number_of_customers / agent.lead_count) * 100 if agent.lead_count else 0
+    if agent.total_days:
+        attendance_percentage = ((agent.present_days + agent.half_day_days / 2) / agent.total_days) * 100
+    else:
+        attendance_percentage = 0.0
+    return {
+        'rank': agent.rank,
+        'agent': agent,
+        'team_leader': agent.team_leader,
+        'attendance': round(attendance_percentage, 2),
+        'lead_count': agent.lead_count,
+        'conversion': round(conversion_rate, 2),
+        'total_invoice_generated': agent.total_invoice_generated,
+        'sales': round(agent.total_sales, 2),
+        'achievements': agent.achievements,
+        'commitment': agent.sales_commitment,
+    }
+
+def snapshot_agent_performance(snapshot_date):
+    # Three grouped queries for all agents and one batched upsert, so re-running the same
+    # date simply overwrites that day's rows.
+    month_start = snapshot_date.replace(day=1)
+    agents = UserProfile.objects.filter(role='Agent')
+
+    sales_totals = {
+        row['agent']: row for row in DailySalesRollup.objects.filter(
+            agent__in=agents, date__range=[month_start, snapshot_date]
+        ).order_by().values('agent').annotate(
+            sales=Sum('completed_revenue'),
+            customers=Sum('completed_customers'),
+            invoices=Sum('completed_invoices'),
+        )
+    }
+    lead_counts = dict(
+        Lead.objects.filter(assigned_to__in=agents).order_by().values('assigned_to')
+        .annotate(lead_count=Count('id')).values_list('assigned_to', 'lead_count')
+    )
+    attendance_totals = {
+        row['user']: row for row in Attendance.objects.filter(
+            user__in=agents, date__range=[month_start, snapshot_date]
+        ).order_by().values('user').annotate(
+            present_days=Count('id', filter=Q(status='Present')),
+            half_days=Count('id', filter=Q(status='Half day')),
+            absent_days=Count('id', filter=Q(status='Absent')),
+        )
+    }
+
+    snapshots = []
+    for agent in agents:
+        sales = sales_totals.get(agent.id, {})
+        attendance = attendance_totals.get(agent.id, {})
+        total_sales = sales.get('sales') or 0
+        customers = sales.get('customers') or 0
+        lead_count = lead_counts.get(agent.id, 0)
+        present_days = attendance.get('present_days', 0)
+        half_days = attendance.get('half_days', 0)
+        absent_days = attendance.get('absent_days', 0)
+        total_days = present_days + half_days + absent_days
+
+        snapshots.append(AgentPerformanceSnapshot(
+            date=snapshot_date,
+            agent=agent,
+            sales=total_sales,
+            customers=customers,
+            invoices=sales.get('invoices') or 0,
+            lead_count=lead_count,
+            present_days=present_days,
+            half_days=half_days,
+            absent_days=absent_days,
+            conversion=round((customers / lead_count) * 100, 2) if lead_count else 0,
+            attendance_percentage=round(((present_days + half_days / 2) / total_days) * 100, 2) if total_days else 0,
+            commitment=agent.commitment,
+            achievement=round((total_sales / agent.commitment) * 100, 2) if agent.commitment else None,
+        ))
+
+    AgentPerformanceSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['agent', 'date'],
+        update_fields=[
+            'sales', 'customers', 'invoices', 'lead_count', 'present_days', 'half_days', 'absent_days',
+            'conversion', 'attendance_percentage', 'commitment', 'achievement',
+        ],
+    )
+    return len(snapshots)
+
+def snapshot_months():
+    return AgentPerformanceSnapshot.objects.filter(
+        date__lt=timezone.localdate().replace(day=1)
+    ).dates('date', 'month', order='DESC')
+
+def snapshot_date_for_month(month):
+    # Only finished months are served from snapshots; the current month is always live.
+    try:
+        month_start = datetime.strptime(month, '%Y-%m').date()
+    except (TypeError, ValueError):
+        return None
+    if month_start >= timezone.localdate().replace(day=1):
+        return None
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return AgentPerformanceSnapshot.objects.filter(
+        date__gte=month_start, date__lt=next_month
+    ).aggregate(latest=Max('date'))['latest']
+
+def snapshot_analytics(snapshots, complaints):
+    totals = snapshots.aggregate(
+        total_revenue=Sum('sales'),
+        total_paid_customers=Sum('customers'),
+        total_invoice_generated=Sum('invoices'),
+        total_leads=Sum('lead_count'),
+        total_present=Sum('present_days'),
+        total_absent=Sum('absent_days'),
+        total_half_day=Sum('half_days'),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    total_attendances = totals['total_present'] + totals['total_absent'] + totals['total_half_day']
+    if total_attendances > 0:
+        totals['attendance_rate'] = ((totals['total_present'] + totals['total_half_day']) / total_attendances) * 100
+    else:
+        totals['attendance_rate'] = 0
+    totals['total_complaints'] = complaints.count()
+    return totals
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def xlsx_file_response(filename, title, headers, rows, number_formats=None):
+    # Write-only mode streams each row to disk as it is appended, and the finished file is
+    # spooled to a temp file, so memory stays flat however many rows are exported.
+    number_formats = number_formats or {}
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(headers)
+
+    for row in rows:
+        cells = []
+        for index, value in enumerate(row):
+            if index in number_formats:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.number_format = number_formats[index]
+                value = cell
+            cells.append(value)
+        ws.append(cells)
+
+    spool = tempfile.TemporaryFile()
+    wb.save(spool)
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+def contact_number_filter(value):
+    # A full number in any of its +91/91/0/bare forms matches on the normalized key; a shorter
+    # run of digits matches numbers ending with it, as a prefix of the reversed key.
+    digits = re.sub(r'\D', '', value)
+    if len(digits) >= 10:
+        return Q(contact_key=normalize_contact_number(value))
+    return Q(contact_key_suffix__startswith=digits[::-1])
+
+def leads_by_contact_number(value):
+    if not re.search(r'\d', value):
+        return Lead.objects.none()
+    return Lead.objects.alias(contact_key_suffix=Reverse('contact_key')).filter(contact_number_filter(value))
+
+def filter_leads(leads, params):
+    # The lead list's filters, shared with actions that apply to "everything matching the list".
+    if params.get('disposition'):
+        leads = leads.filter(disposition=params['disposition'])
+
+    if params.get('sub_disposition'):
+        sub_disposition_ids = SubDisposition.objects.filter(name__icontains=params['sub_disposition']).values_list('id', flat=True)
+        leads = leads.filter(sub_disposition__in=list(sub_disposition_ids))
+
+    if params.get('start_date'):
+        leads = leads.filter(date__gte=params['start_date'])
+
+    if params.get('end_date'):
+        leads = leads.filter(date__lte=params['end_date'])
+
+    if params.get('search'):
+        leads = search_leads(leads, params['search'])
+    return leads
+
+def search_leads(queryset, query, lead_path=None, extra_filter=None):
+    # Matching leads are found with icontains on name and number, which the trigram GIN
+    # indexes on Lead serve. Querysets over related models match on lead ids so the index
+    # is still used, and every row gets a similarity score to order by.
+    matches = Q(full_name__icontains=query) | Q(contact_number__icontains=query)
+    if CONTACT_QUERY_RE.fullmatch(query) and len(re.sub(r'\D', '', query)) >= 4:
+        matches |= contact_number_filter(query)
+    if lead_path:
+        condition = Q(**{f'{lead_path}__in': Lead.objects.alias(contact_key_suffix=Reverse('contact_key')).filter(matches)})
+        prefix = f'{lead_path}__'
+    else:
+        queryset = queryset.alias(contact_key_suffix=Reverse('contact_key'))
+        condition = matches
+        prefix = ''
+    if extra_filter is not None:
+        condition |= extra_filter
+
+    return queryset.filter(condition).annotate(
+        search_rank=Coalesce(
+            Greatest(
+                TrigramSimilarity(f'{prefix}full_name', query),
+                TrigramSimilarity(f'{prefix}contact_number', query),
+            ),
+            Value(0.0),
+            output_field=FloatField()
+        )
+    )
+
+def backfill_contact_keys(model, batch_size=2000, refresh_all=False):
+    rows = model.objects.all() if refresh_all else model.objects.filter(contact_key='')
+    updated = []
+    count = 0
+    for row in rows.only('id', 'contact_number', 'contact_key').order_by('id').iterator(chunk_size=batch_size):
+        contact_key = normalize_contact_number(row.contact_number)
+        if contact_key != row.contact_key:
+            row.contact_key = contact_key
+            updated.append(row)
+        if len(updated) >= batch_size:
+            model.objects.bulk_update(updated, ['contact_key'])
+            count += len(updated)
+            updated = []
+    if updated:
+        model.objects.bulk_update(updated, ['contact_key'])
+        count += len(updated)
+    return count
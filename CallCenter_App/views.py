@@ -1,27 +1,28 @@
+import asyncio
 import json
 import csv
 import io
 import os
 import re
-import pandas as pd
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 from io import BytesIO
 from datetime import datetime, timedelta, date
 import openpyxl
 import pdfkit
 from num2words import num2words
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db import IntegrityError
-from dateutil import parser as date_parser
+from django.db import IntegrityError, DatabaseError, connection
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.views import LoginView, LogoutView
+from django.contrib.auth.views import LoginView, LogoutView, redirect_to_login
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.core.management import call_command
 from django.db import transaction
 from django.db.models import Sum, Q, Count
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.defaultfilters import floatformat
 from django.template.loader import render_to_string
@@ -35,14 +36,28 @@ from .forms import (
     CustomUserCreationForm, CustomUserChangeForm, CustomAuthenticationForm,
     CompanyForm,ComplaintForm, LeadImportForm, PaidCustomerForm,
     PaymentMethodForm, TeamForm, AddAgentToTeamForm, LeadForm, BreakTypeForm,
-    PackageForm, SubDispositionForm, UpdateSalesForm, PaymentMethod, Package
+    PackageForm, SubDispositionForm, UpdateSalesForm, PaymentMethod, Package, BulkLeadImportForm
 )
 from .models import (
     Team, Attendance, BreakType, Break, UserProfile, Complaint, Lead,
     LeadTransferRecord, SubDisposition, PaidCustomer, Company, Invoice,
-    InvoicePDF, AgentSalesHistory
+    InvoicePDF, AgentSalesHistory, DailySalesRollup, AgentPerformanceSnapshot, ImportJob, ImportJobFile,
+    ImportMapping
 )
-from .utils import record_action, record_agent_sales_history
+from .utils import (
+    record_action, record_agent_sales_history, daily_sales_series, sales_rollup_totals,
+    sales_rollup_cells, refresh_sales_rollup, attendance_counts, payment_status_counts,
+    disposition_counts, sales_leaderboard, snapshot_leaderboard, sales_summary_row, snapshot_months,
+    snapshot_date_for_month, snapshot_analytics, xlsx_file_response, search_leads, leads_by_contact_number,
+    reassign_leads, filter_leads
+)
+from .dashboard_cache import (
+    DASHBOARD_WIDGETS, get_cached_dashboard, aget_cached_dashboard, get_dashboard_cache_stats,
+    invalidate_dashboard_cache
+)
+from .pagination import EstimatedCountPaginator, paginate
+from .lead_import import import_job_header, import_job_progress
+from .lead_distribution import DISTRIBUTION_STRATEGIES, clean_distribution_options, distribute_leads
 
 ##############################################################################################################################################
 
@@ -172,208 +187,225 @@ def break_state(request, user_id):
     return JsonResponse(response)
 
 
-@login_required
-def dashboard(request):
-    user_profile = request.user.profile
+def dashboard_queries(user):
+    # Each entry is an independent query group, so the async dashboard can run them side by side.
+    user_profile = user.profile
     today = timezone.localtime(timezone.now()).date()
-    start_of_month = today.replace(day=1)
+    thirty_days_ago = today - timedelta(days=30)
+    revenue_field = 'verified_revenue'
+
+    if user.is_superuser:
+        sales_rollups = DailySalesRollup.objects.all()
+        revenue_field = 'completed_revenue'
+        attendances = Attendance.objects.all()
+        all_paid_customers = PaidCustomer.objects.all()
+        all_leads = Lead.objects.all()
 
-    sales_data = []
-    labels = []
-    all_paid_customers = PaidCustomer.objects.none()  
-    all_leads = Lead.objects.none()  
-    attendance_rate = 0
-    total_present = 0
-    total_absent = 0
-    total_half_day = 0
+    elif user_profile.role == 'Team Leader':
+        teams = Team.objects.filter(leader=user_profile)
+        team_agents = UserProfile.objects.filter(teams_as_agent__in=teams)
+        first_team = teams.order_by('id')[:1]
 
-    if request.user.is_superuser:
-        amount_paid = Invoice.objects.filter(customer__payment_status='completed').aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-        unique_customers_today = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date=today).values('contact_number').distinct().count()
-        today_sales_amount = Invoice.objects.filter(customer__payment_status='completed', customer__payment_date=today).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-        unique_customers_this_month = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date__gte=start_of_month).values('contact_number').distinct().count()
-        this_month_sales_amount = Invoice.objects.filter(customer__payment_status='completed', customer__payment_date__gte=start_of_month).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
+        sales_rollups = DailySalesRollup.objects.filter(agent__in=team_agents)
+        attendances = Attendance.objects.filter(user__in=team_agents)
+        all_paid_customers = PaidCustomer.objects.filter(lead__assigned_to_team__in=first_team)
+        all_leads = Lead.objects.filter(assigned_to_team__in=first_team)
 
+    elif user_profile.role == 'Agent':
+        sales_rollups = DailySalesRollup.objects.filter(agent=user_profile)
+        attendances = Attendance.objects.filter(user=user_profile)
+        all_paid_customers = PaidCustomer.objects.filter(lead__assigned_to=user_profile)
+        all_leads = Lead.objects.filter(assigned_to=user_profile)
+
+    else:
+        sales_rollups = DailySalesRollup.objects.none()
+        attendances = Attendance.objects.none()
+        all_paid_customers = PaidCustomer.objects.none()
+        all_leads = Lead.objects.none()
+
+    queries = {
+        'sales_totals': lambda: sales_rollup_totals(sales_rollups, today, revenue_field=revenue_field),
+        'sales_series': lambda: daily_sales_series(sales_rollups, thirty_days_ago, today),
+        'attendance_totals': lambda: attendance_counts(attendances),
+        'paid_customer_counts': lambda: payment_status_counts(all_paid_customers, distinct_contacts=user.is_superuser),
+        'lead_counts': lambda: disposition_counts(all_leads),
+    }
+
+    if user.is_superuser:
         last_month_start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
         last_month_end = today.replace(day=1) - timedelta(days=1)
+        queries['team_sales'] = lambda: list(Team.objects.select_related('leader__user').annotate(
+            total_sales=Sum('sales_rollups__verified_revenue'),
+            total_sales_last_month=Sum(
+                'sales_rollups__verified_revenue',
+                filter=Q(sales_rollups__date__range=[last_month_start, last_month_end])
+            ),
+        ).order_by('id'))
 
-        unique_customers_last_month = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date__range=[last_month_start, last_month_end]).values('contact_number').distinct().count()
+    return queries
+
+
+def sales_totals_widget(user, results):
+    return results['sales_totals']
+
+
+def sales_series_widget(user, results):
+    sales_data, labels = results['sales_series']
+    return {
+        'sales_data': sales_data,
+        'sales_labels': labels,
+    }
 
-        teams = Team.objects.all()
-        team_leader_sales_last_month = {}
-        for team in teams:
-            total_sales_last_month = Invoice.objects.filter(
-                customer__lead__assigned_to_team=team,
-                customer__payment_status='completed',
-                customer__verified=True,
-                customer__payment_date__range=[last_month_start, last_month_end]
-            ).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-            team_leader_name = f"{team.leader.user.first_name} {team.leader.user.last_name}"
-            team_leader_sales_last_month[team_leader_name] = total_sales_last_month
 
+def team_sales_widget(user, results):
+    if user.is_superuser:
+        team_leader_sales_last_month = {}
         team_leader_sales = {}
-        for team in teams:
-            total_sales_amount = Invoice.objects.filter(
-                customer__lead__assigned_to_team=team,
-                customer__payment_status='completed',
-                customer__verified=True
-            ).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
+        for team in results['team_sales']:
             team_leader_name = f"{team.leader.user.first_name} {team.leader.user.last_name}"
-            team_leader_sales[team_leader_name] = total_sales_amount
+            team_leader_sales_last_month[team_leader_name] = team.total_sales_last_month or 0
+            team_leader_sales[team_leader_name] = team.total_sales or 0
+    else:
+        sales_totals = results['sales_totals']
+        team_leader_sales_last_month = {user.get_full_name(): sales_totals['unique_customers_last_month']}
+        team_leader_sales = {user.get_full_name(): sales_totals['this_month_sales_amount']}
 
-        total_attendances = Attendance.objects.count()
-        total_present = Attendance.objects.filter(status='Present').count()
-        total_absent = Attendance.objects.filter(status='Absent').count()
-        total_half_day = Attendance.objects.filter(status='Half day').count()
+    return {
+        'team_leader_sales': team_leader_sales,
+        'team_leader_sales_last_month': team_leader_sales_last_month,
+    }
 
-        if total_attendances > 0:
-            attendance_rate = ((total_present + total_half_day) / total_attendances) * 100
 
-        thirty_days_ago = today - timedelta(days=30)
-        current_date = thirty_days_ago
-        while current_date <= today:
-            sales_amount = Invoice.objects.filter(
-                customer__payment_status='completed',
-                customer__verified=True,
-                customer__payment_date=current_date
-            ).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
+def attendance_widget(user, results):
+    attendance_totals = results['attendance_totals']
+    attendance_overall_look = {
+        'labels': ['Present', 'Absent', 'Half day'],
+        'data': [attendance_totals['total_present'], attendance_totals['total_absent'], attendance_totals['total_half_day']]
+    }
+    return {
+        'attendance_rate': attendance_totals['attendance_rate'],
+        'attendance_overall_look': attendance_overall_look,
+    }
 
-            sales_data.append(float(sales_amount))
-            labels.append(current_date.strftime('%Y-%m-%d'))
 
-            current_date += timedelta(days=1)
+def overview_widget(user, results):
+    paid_customer_counts = results['paid_customer_counts']
+    lead_counts = results['lead_counts']
 
-        all_paid_customers = PaidCustomer.unique_paid_customers()
-        all_leads = Lead.objects.all()
+    paid_customers_overall_look = {
+        'labels': ['Pending', 'Completed', 'Failed'],
+        'data': [paid_customer_counts['pending'], paid_customer_counts['completed'], paid_customer_counts['failed']]
+    }
 
-    elif user_profile.role == 'Team Leader':
-        teams = Team.objects.filter(leader=user_profile)
-        team_agents = UserProfile.objects.filter(teams_as_agent__in=teams)
+    all_leads_overall_look = {
+        'labels': ['Fresh', 'Connected', 'Not connected'],
+        'data': [lead_counts['fresh'], lead_counts['connected'], lead_counts['not_connected']]
+    }
 
-        amount_paid = Invoice.objects.filter(customer__payment_status='completed', customer__verified=True, customer__lead__assigned_to__in=team_agents).aggregate(total_amount_paid=Sum('customer__amount_with_gst'))['total_amount_paid'] or 0
-        unique_customers_today = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date=today, lead__assigned_to__in=team_agents).values('contact_number').distinct().count()
-        today_sales_amount = Invoice.objects.filter(customer__payment_status='completed', customer__verified=True, customer__payment_date=today, customer__lead__assigned_to__in=team_agents).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-        unique_customers_this_month = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date__gte=start_of_month, lead__assigned_to__in=team_agents).values('contact_number').distinct().count()
-        this_month_sales_amount = Invoice.objects.filter(customer__payment_status='completed', customer__verified=True, customer__payment_date__gte=start_of_month, customer__lead__assigned_to__in=team_agents).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
+    return {
+        'all_paid_customers_count': paid_customer_counts['total'],
+        'all_leads_count': lead_counts['total'],
+        'paid_customers_overall_look': paid_customers_overall_look,
+        'all_leads_overall_look': all_leads_overall_look,
+    }
 
-        last_month_start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        last_month_end = today.replace(day=1) - timedelta(days=1)
-        unique_customers_last_month = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date__range=[last_month_start, last_month_end], lead__assigned_to__in=team_agents).values('contact_number').distinct().count()
-
-        team_leader_sales_last_month = {user_profile.user.get_full_name(): unique_customers_last_month}
-        team_leader_sales = {user_profile.user.get_full_name(): this_month_sales_amount}
-
-        total_attendances = Attendance.objects.filter(user__in=team_agents).count()
-        total_present = Attendance.objects.filter(user__in=team_agents, status='Present').count()
-        total_absent = Attendance.objects.filter(user__in=team_agents, status='Absent').count()
-        total_half_day = Attendance.objects.filter(user__in=team_agents, status='Half day').count()
-
-        if total_attendances > 0:
-            attendance_rate = ((total_present + total_half_day) / total_attendances) * 100
-
-        thirty_days_ago = today - timedelta(days=30)
-        current_date = thirty_days_ago
-        while current_date <= today:
-            sales_amount = Invoice.objects.filter(
-                customer__payment_status='completed',
-                customer__verified=True,
-                customer__payment_date=current_date,
-                customer__lead__assigned_to__in=team_agents
-            ).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-
-            sales_data.append(float(sales_amount))
-            labels.append(current_date.strftime('%Y-%m-%d'))
-            current_date += timedelta(days=1)
-
-        if teams.exists(): 
-            team = teams.first()  
-            all_paid_customers = PaidCustomer.objects.filter(lead__assigned_to_team=team)
-            all_leads = Lead.objects.filter(assigned_to_team=team)
 
-    elif user_profile.role == 'Agent':
-        amount_paid = Invoice.objects.filter(customer__payment_status='completed', customer__verified=True, customer__lead__assigned_to=user_profile).aggregate(total_amount_paid=Sum('customer__amount_with_gst'))['total_amount_paid'] or 0
-        unique_customers_today = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date=today, lead__assigned_to=user_profile).values('contact_number').distinct().count()
-        today_sales_amount = Invoice.objects.filter(customer__payment_status='completed', customer__verified=True, customer__payment_date=today, customer__lead__assigned_to=user_profile).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-        unique_customers_this_month = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date__gte=start_of_month, lead__assigned_to=user_profile).values('contact_number').distinct().count()
-        this_month_sales_amount = Invoice.objects.filter(customer__payment_status='completed', customer__verified=True, customer__payment_date__gte=start_of_month, customer__lead__assigned_to=user_profile).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
+DASHBOARD_WIDGET_BUILDERS = {
+    'sales-totals': (('sales_totals',), sales_totals_widget),
+    'sales-series': (('sales_series',), sales_series_widget),
+    'team-sales': (('team_sales',), team_sales_widget),
+    'attendance': (('attendance_totals',), attendance_widget),
+    'overview': (('paid_customer_counts', 'lead_counts'), overview_widget),
+}
 
-        last_month_start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        last_month_end = today.replace(day=1) - timedelta(days=1)
-        unique_customers_last_month = PaidCustomer.objects.filter(payment_status='completed', verified=True, payment_date__range=[last_month_start, last_month_end], lead__assigned_to=user_profile).values('contact_number').distinct().count()
 
-        team_leader_sales_last_month = {user_profile.user.get_full_name(): unique_customers_last_month}
-        team_leader_sales = {user_profile.user.get_full_name(): this_month_sales_amount}
+def build_dashboard_context(user, results):
+    context = {}
+    for groups, build_widget in DASHBOARD_WIDGET_BUILDERS.values():
+        context.update(build_widget(user, results))
+    return context
 
-        total_attendances = Attendance.objects.filter(user=user_profile).count()
-        total_present = Attendance.objects.filter(user=user_profile, status='Present').count()
-        total_absent = Attendance.objects.filter(user=user_profile, status='Absent').count()
-        total_half_day = Attendance.objects.filter(user=user_profile, status='Half day').count()
 
-        if total_attendances > 0:
-            attendance_rate = ((total_present + total_half_day) / total_attendances) * 100
+def dashboard_widget_context(user, widget):
+    queries = dashboard_queries(user)
+    groups, build_widget = DASHBOARD_WIDGET_BUILDERS[widget]
+    if widget == 'team-sales' and not user.is_superuser:
+        groups = ('sales_totals',)
+    return build_widget(user, {name: queries[name]() for name in groups})
 
-        thirty_days_ago = today - timedelta(days=30)
-        current_date = thirty_days_ago
-        while current_date <= today:
-            sales_amount = Invoice.objects.filter(
-                customer__payment_status='completed',
-                customer__verified=True,
-                customer__payment_date=current_date,
-                customer__lead__assigned_to=user_profile
-            ).aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
 
-            sales_data.append(float(sales_amount))
-            labels.append(current_date.strftime('%Y-%m-%d'))
+def dashboard_context(user):
+    results = {name: query() for name, query in dashboard_queries(user).items()}
+    return build_dashboard_context(user, results)
 
-            current_date += timedelta(days=1)
 
-        all_paid_customers = PaidCustomer.objects.filter(lead__assigned_to=user_profile)
-        all_leads = Lead.objects.filter(assigned_to=user_profile)
+# Each thread keeps its own database connection between requests, so this also caps the
+# extra connections the async dashboard holds per process.
+dashboard_query_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='dashboard-query')
 
-    paid_customers_overall_look = {
-        'labels': ['Pending', 'Completed', 'Failed'],
-        'data': [
-            all_paid_customers.filter(payment_status='pending').count(),
-            all_paid_customers.filter(payment_status='completed').count(),
-            all_paid_customers.filter(payment_status='failed').count()
-        ]
-    }
 
-    all_leads_overall_look = {
-        'labels': ['Fresh', 'Connected', 'Not connected'],
-        'data': [
-            all_leads.filter(disposition='Fresh').count(),
-            all_leads.filter(disposition='Connected').count(),
-            all_leads.filter(disposition='Not connected').count()
-        ]
-    }
+def run_dashboard_query(query):
+    try:
+        return query()
+    except DatabaseError:
+        connection.close()
+        raise
 
-    attendance_overall_look = {
-        'labels': ['Present', 'Absent', 'Half day'],
-        'data': [total_present, total_absent, total_half_day]
-    }
 
-    context = {
-        'sales_data': sales_data,
-        'sales_labels': labels,
-        'all_leads': all_leads,
-        'attendance_rate': attendance_rate,
-        'all_paid_customers': all_paid_customers,
-        'team_leader_sales': team_leader_sales,
-        'amount_paid': amount_paid,
-        'unique_customers_today': unique_customers_today,
-        'today_sales_amount': today_sales_amount,
-        'unique_customers_this_month': unique_customers_this_month,
-        'this_month_sales_amount': this_month_sales_amount,
-        'unique_customers_last_month': unique_customers_last_month,
-        'team_leader_sales_last_month': team_leader_sales_last_month,
-        'paid_customers_overall_look': paid_customers_overall_look,
-        'all_leads_overall_look': all_leads_overall_look,
-        'attendance_overall_look': attendance_overall_look,
-    }
+async def dashboard_context_async(user):
+    # Django's async ORM methods all go through one thread-sensitive executor, which would run
+    # these groups one after another; the dedicated executor lets the queries actually overlap.
+    queries = await sync_to_async(dashboard_queries)(user)
+    values = await asyncio.gather(*(
+        sync_to_async(run_dashboard_query, thread_sensitive=False, executor=dashboard_query_executor)(query)
+        for query in queries.values()
+    ))
+    return await sync_to_async(build_dashboard_context)(user, dict(zip(queries, values)))
+
+
+def dashboard_scope(user):
+    if user.is_superuser:
+        return 'superuser', 0
+    return user.profile.role, user.profile.id
 
+
+@login_required
+def dashboard(request):
+    return render(request, 'dashboard_shell.html', {'dashboard_widgets': DASHBOARD_WIDGETS})
+
+@login_required
+def dashboard_full(request):
+    role, scope_id = dashboard_scope(request.user)
+    context = get_cached_dashboard(role, scope_id, lambda: dashboard_context(request.user))
     return render(request, 'dashboard.html', context)
 
+@login_required
+def dashboard_widget(request, widget):
+    if widget not in DASHBOARD_WIDGET_BUILDERS:
+        return JsonResponse({'error': 'Unknown widget'}, status=404)
+
+    role, scope_id = dashboard_scope(request.user)
+    data = get_cached_dashboard(
+        role, scope_id, lambda: dashboard_widget_context(request.user, widget), widget=widget
+    )
+    return JsonResponse(data)
+
+async def dashboard_async(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    role, scope_id = await sync_to_async(dashboard_scope)(user)
+
+    context = await aget_cached_dashboard(role, scope_id, lambda: dashboard_context_async(user))
+    return await sync_to_async(render)(request, 'dashboard.html', context)
+
+@login_required
+def dashboard_cache_stats(request):
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    return JsonResponse(get_dashboard_cache_stats())
+
 
 ############STAFF########STAFF#########STAFF######STAFF#########STAFF#######STAFF#######STAFF#########STAFF###########################################################################
 
@@ -446,9 +478,9 @@ def staff_list(request):
             else:
                 my_team_members = my_team_members.order_by('user__first_name', 'user__last_name')
 
-    team_leaders_paginator = Paginator(team_leaders, 10)  
-    agents_paginator = Paginator(agents, 10) 
-    my_team_members_paginator = Paginator(my_team_members, 10)  
+    team_leaders_paginator = EstimatedCountPaginator(team_leaders, 10)  
+    agents_paginator = EstimatedCountPaginator(agents, 10) 
+    my_team_members_paginator = EstimatedCountPaginator(my_team_members, 10)  
 
     try:
         team_leaders_page = team_leaders_paginator.page(page)
@@ -641,7 +673,6 @@ def lead_list(request):
     start_date = request.GET.get('start_date', '')
     end_date = request.GET.get('end_date', '')
     sort_by = request.GET.get('sort', 'id')
-    page = request.GET.get('page', 1)
 
     leads = Lead.objects.all()
     teams = Team.objects.all()
@@ -654,7 +685,8 @@ def lead_list(request):
         team = Team.objects.filter(leader=request.user.profile).first()
         if team:
             team_members = team.agents.all()
-            leads = leads.filter(Q(assigned_to__in=team_members) | Q(assigned_to_team=team))
+            member_ids = list(team_members.values_list('id', flat=True))
+            leads = leads.filter(Q(assigned_to__in=member_ids) | Q(assigned_to_team=team))
             other_teams = Team.objects.all().exclude(leader=request.user.profile)
         else:
             leads = Lead.objects.none()
@@ -666,28 +698,14 @@ def lead_list(request):
         if my_team:
             my_team_members = my_team.agents.exclude(id=request.user.profile.id).select_related('user')
 
-    if disposition:
-        leads = leads.filter(disposition=disposition)
-
-    if sub_disposition:
-        leads = leads.filter(sub_disposition__name__icontains=sub_disposition)
-
-    if start_date:
-        leads = leads.filter(date__gte=start_date)
-
-    if end_date:
-        leads = leads.filter(date__lte=end_date)
-
-    leads = leads.order_by(sort_by)
+    leads = filter_leads(leads, request.GET)
+    if search_query:
+        leads = leads.order_by('-search_rank', sort_by)
+    else:
+        leads = leads.order_by(sort_by)
 
-    paginator = Paginator(leads, 10)  
-
-    try:
-        leads = paginator.page(page)
-    except PageNotAnInteger:
-        leads = paginator.page(1)
-    except EmptyPage:
-        leads = paginator.page(paginator.num_pages)
+    lead_count_paginator = EstimatedCountPaginator(leads, 10)
+    leads = paginate(request, leads, paginator_class=EstimatedCountPaginator)
 
     if request.method == 'POST' and 'file' in request.FILES:
         form = LeadImportForm(request.POST, request.FILES)
@@ -695,28 +713,24 @@ def lead_list(request):
             uploaded_file = request.FILES['file']
             file_extension = uploaded_file.name.split('.')[-1].lower()
 
-            if file_extension == 'csv':
-                file_data = uploaded_file.read().decode('utf-8')
-            elif file_extension in ['xls', 'xlsx']:
-                df = pd.read_excel(uploaded_file)
-                file_data = df.to_csv(index=False)
+            if file_extension in ['csv', 'xlsx']:
+                job = ImportJob(uploaded_by=request.user, original_name=uploaded_file.name)
+                job.file.save(uploaded_file.name, uploaded_file)
             else:
                 messages.error(request, 'Unsupported file format. Please upload a CSV or XLSX file.')
                 return redirect('lead_list')
 
-            request.session['uploaded_file'] = file_data
+            request.session['import_job_id'] = job.id
             return redirect('lead_mapping')
     else:
         form = LeadImportForm()
-
-    if search_query:
-        leads = Lead.objects.filter(
-            Q(full_name__icontains=search_query) |
-            Q(contact_number__icontains=search_query)
-        )
+    bulk_import_form = BulkLeadImportForm() if request.user.is_superuser else None
 
     context = {
         'leads': leads,
+        'distribution_strategies': DISTRIBUTION_STRATEGIES,
+        'lead_count': lead_count_paginator.count,
+        'lead_count_estimated': lead_count_paginator.count_estimated,
         'teams': teams,
         'agents': agents,
         'search_query': search_query,
@@ -729,6 +743,7 @@ def lead_list(request):
         'sub_disposition_choices': SubDisposition.objects.all(),
         'is_superuser': request.user.is_superuser,
         'form': form,
+        'bulk_import_form': bulk_import_form,
         'team_members': team_members,
         'my_team_members': my_team_members,
         'other_teams': other_teams,
@@ -738,56 +753,96 @@ def lead_list(request):
 
 @login_required
 def lead_mapping(request):
-    file_data = request.session.get('uploaded_file')
-    if not file_data:
+    job = ImportJob.objects.filter(id=request.session.get('import_job_id'), status='Uploaded').first()
+    if not job:
         messages.error(request, 'No file data found. Please upload a file first.')
         return redirect('lead_list')
 
-    csv_reader = csv.reader(io.StringIO(file_data))
-    header = next(csv_reader)
-    lead_fields = [field.name.lower() for field in Lead._meta.get_fields() if field.concrete]
-    date_fields = ['date', 'reminder']
+    header = import_job_header(job)
+    lead_fields = [
+        field.name.lower() for field in Lead._meta.get_fields()
+        if field.concrete and field.editable and not field.primary_key
+    ]
 
     if request.method == 'POST':
         mapping = request.POST.getlist('mapping')
-        for row in csv_reader:
-            lead_data = {}
-            for i in range(len(lead_fields)):
-                if mapping[i]:
-                    field_name = lead_fields[i]
-                    try:
-                        column_index = header.index(next(col for col in header if col.lower() == mapping[i].lower()))
-                        value = row[column_index]
-                    except StopIteration:
-                        messages.error(request, f'No matching column found for field {field_name}: {mapping[i]}')
-                        return redirect('lead_mapping')
-                    
-                    if field_name in date_fields:
-                        try:
-                            parsed_date = date_parser.parse(value)
-                            value = parsed_date.strftime('%Y-%m-%d')
-                        except (ValueError, date_parser.ParserError):
-                            messages.error(request, f'Invalid date format for field {field_name}: {value}. Please ensure it is a valid date.')
-                            return redirect('lead_mapping')
-
-                    lead_data[field_name] = value
-
-            contact_number = lead_data.get('contact_number')
-            if contact_number:
+        columns = {}
+        for i in range(len(lead_fields)):
+            if mapping[i]:
+                field_name = lead_fields[i]
                 try:
-                    Lead.objects.create(**lead_data)
-                except IntegrityError:
-                    Lead.objects.filter(contact_number=contact_number).update(**lead_data)
+                    columns[field_name] = header.index(next(col for col in header if col.lower() == mapping[i].lower()))
+                except StopIteration:
+                    messages.error(request, f'No matching column found for field {field_name}: {mapping[i]}')
+                    return redirect('lead_mapping')
+
+        save_mapping_as = request.POST.get('save_mapping_as', '').strip()
+        if save_mapping_as:
+            ImportMapping.objects.update_or_create(
+                name=save_mapping_as,
+                defaults={'columns': {field: header[index] for field, index in columns.items()}, 'created_by': request.user}
+            )
 
-        messages.success(request, 'Leads imported successfully.')
-        return redirect('lead_list')
+        job.mapping = columns
+        job.method = 'copy' if request.user.is_superuser and request.POST.get('use_copy') else 'bulk'
+        job.status = 'Queued'
+        job.save(update_fields=['mapping', 'method', 'status'])
+        request.session.pop('import_job_id', None)
+        messages.success(request, 'Lead import queued. Progress is shown below.')
+        return redirect('lead_import_progress', job_id=job.id)
 
     context = {
         'header': header,
         'lead_fields': lead_fields,
+        'is_superuser': request.user.is_superuser,
     }
     return render(request, 'lead_mapping.html', context)
 
+@login_required
+@require_POST
+def bulk_import_leads(request):
+    if not request.user.is_superuser:
+        messages.error(request, 'Only superusers can import several files at once.')
+        return redirect('lead_list')
+
+    form = BulkLeadImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+        return redirect('lead_list')
+
+    uploads = form.cleaned_data['files']
+    job = ImportJob.objects.create(
+        uploaded_by=request.user,
+        original_name=f"{len(uploads)} files ({form.cleaned_data['mapping'].name})",
+        mapping=form.cleaned_data['mapping'].columns,
+        method='copy' if request.POST.get('use_copy') else 'bulk',
+    )
+    for uploaded_file in uploads:
+        import_file = ImportJobFile(job=job, original_name=uploaded_file.name)
+        import_file.file.save(uploaded_file.name, uploaded_file)
+    job.status = 'Queued'
+    job.save(update_fields=['status'])
+    messages.success(request, 'Lead import queued. Progress is shown below.')
+    return redirect('lead_import_progress', job_id=job.id)
+
+@login_required
+def lead_import_progress(request, job_id):
+    jobs = ImportJob.objects.all() if request.user.is_superuser else ImportJob.objects.filter(uploaded_by=request.user)
+    job = get_object_or_404(jobs, id=job_id)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(import_job_progress(job))
+    return render(request, 'lead_import_progress.html', {'job': job, 'progress': import_job_progress(job)})
+
+@login_required
+def lead_import_rejected_rows(request, job_id):
+    jobs = ImportJob.objects.all() if request.user.is_superuser else ImportJob.objects.filter(uploaded_by=request.user)
+    job = get_object_or_404(jobs, id=job_id)
+    if not job.rejected_file:
+        messages.error(request, 'This import has no rejected rows.')
+        return redirect('lead_import_progress', job_id=job.id)
+    return FileResponse(job.rejected_file.open('rb'), as_attachment=True, filename=os.path.basename(job.rejected_file.name))
+
 def lead_history(request, lead_id):
     lead = get_object_or_404(Lead, id=lead_id)
     history = lead.history.all().order_by('-timestamp')
@@ -873,68 +928,89 @@ def assign_leads_to_team(request):
         
         if team_id:
             team = Team.objects.get(id=team_id)
-            leads.update(assigned_to_team=team)
-            for lead in leads:
-                record_action(lead, 'Lead Assigned', user_profile.user.username, f'Assigned to team {team.name}', transfer_note)
+            reassign_leads(
+                leads, {'assigned_to_team': team}, 'Lead Assigned', request.user.username,
+                f'Assigned to team {team.name}', transfer_note
+            )
             messages.success(request, 'Leads assigned to team successfully.')
         
         elif agent_id:
-            agent_profile = UserProfile.objects.get(user_id=agent_id)
-            for lead in leads:
-                lead.assigned_to = agent_profile
-                lead.save()
-                record_action(lead, 'Lead Assigned', user_profile.user.username, f'Assigned to agent {agent_profile.user.get_full_name()}', transfer_note)
+            agent_profile = UserProfile.objects.select_related('user').get(user_id=agent_id)
+            reassign_leads(
+                leads, {'assigned_to': agent_profile}, 'Lead Assigned', request.user.username,
+                f'Assigned to agent {agent_profile.user.get_full_name()}', transfer_note
+            )
             messages.success(request, 'Leads assigned to agent successfully.')
 
     elif user_profile.role == 'Team Leader':
         team_member_id = request.POST.get('team_member')
         new_team_id = request.POST.get('other_team_leader')
         if team_member_id:
-            team_member_profile = UserProfile.objects.get(user_id=team_member_id)
-            for lead in leads:
-                lead.assigned_to = team_member_profile.user.profile
-                lead.save()
-                record_action(lead, 'Lead Assigned', user_profile.user.get_full_name(), f'Assigned to team member {team_member_profile.user.get_full_name()}', transfer_note)
+            team_member_profile = UserProfile.objects.select_related('user').get(user_id=team_member_id)
+            reassign_leads(
+                leads, {'assigned_to': team_member_profile}, 'Lead Assigned', request.user.get_full_name(),
+                f'Assigned to team member {team_member_profile.user.get_full_name()}', transfer_note
+            )
             messages.success(request, 'Leads assigned to team member successfully.')
         
         elif new_team_id:
-            new_team = Team.objects.get(id=new_team_id)
-            leads.update(assigned_to=None)  
-            leads.update(assigned_to_team=new_team)
-            for lead in leads:
-                LeadTransferRecord.objects.create(
-                    lead=lead,
-                    from_user=user_profile,
-                    to_user=new_team.leader,
-                    transfer_remark=transfer_note,
-                    disposition=lead.disposition,
-                    sub_disposition=lead.sub_disposition
-                )
-                record_action(lead, 'Lead Transferred', user_profile.user.get_full_name(), f'Transferred to team {new_team.name}', transfer_note)
+            new_team = Team.objects.select_related('leader').get(id=new_team_id)
+            reassign_leads(
+                leads, {'assigned_to': None, 'assigned_to_team': new_team}, 'Lead Transferred',
+                request.user.get_full_name(), f'Transferred to team {new_team.name}', transfer_note,
+                transferred_by=user_profile, transferred_to=new_team.leader
+            )
             messages.success(request, 'Leads transferred to new team successfully.')
 
     elif user_profile.role == 'Agent':
         other_agent_id = request.POST.get('other_agent')
         
         if other_agent_id:
-            other_agent_profile = UserProfile.objects.get(user_id=other_agent_id)
-            for lead in leads:
-                lead.assigned_to = other_agent_profile.user.profile
-                lead.save()
-                LeadTransferRecord.objects.create(
-                    lead=lead,
-                    from_user=user_profile,
-                    to_user=other_agent_profile,
-                    transfer_remark=transfer_note,
-                    disposition=lead.disposition,
-                    sub_disposition=lead.sub_disposition
-                )
-                record_action(lead, 'Lead Transferred', user_profile.user.get_full_name(), f'Transferred to agent {other_agent_profile.user.get_full_name()}', transfer_note)
+            other_agent_profile = UserProfile.objects.select_related('user').get(user_id=other_agent_id)
+            reassign_leads(
+                leads, {'assigned_to': other_agent_profile}, 'Lead Transferred', request.user.get_full_name(),
+                f'Transferred to agent {other_agent_profile.user.get_full_name()}', transfer_note,
+                transferred_by=user_profile, transferred_to=other_agent_profile
+            )
             messages.success(request, 'Leads transferred to other agent successfully.')
 
     return redirect('lead_list')
 
 
+@login_required
+@require_POST
+def distribute_lead_list(request):
+    if not request.user.is_superuser:
+        messages.error(request, 'Only superusers can distribute leads.')
+        return redirect('lead_list')
+
+    team = Team.objects.filter(id=request.POST.get('distribution_team') or None).first()
+    strategy = request.POST.get('strategy')
+    if not team or strategy not in dict(DISTRIBUTION_STRATEGIES):
+        messages.error(request, 'Choose a team and a distribution method.')
+        return redirect('lead_list')
+
+    try:
+        capacity = clean_distribution_options(
+            request.POST.get('capacity'), request.POST.get('start_date'), request.POST.get('end_date')
+        )
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('lead_list')
+
+    leads = filter_leads(Lead.objects.all(), request.POST)
+    if request.POST.get('unassigned_only'):
+        leads = leads.filter(assigned_to__isnull=True)
+
+    try:
+        shares = distribute_leads(leads, team, strategy, request.user.username, capacity)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('lead_list')
+
+    messages.success(request, f'Distributed {sum(shares.values())} leads across {len(shares)} agents of {team.name}.')
+    return redirect('lead_list')
+
 @require_POST
 def dispose_lead(request):
     if request.method == 'POST':
@@ -982,12 +1058,11 @@ def lead_transfers(request):
     end_date = request.GET.get('end_date')
     sub_disposition = request.GET.get('sub_disposition', '')
     sort = request.GET.get('sort', '-id')
-    page = request.GET.get('page', 1)
 
     lead_transfers = LeadTransferRecord.objects.all()
 
     if contact_number:
-        lead_transfers = lead_transfers.filter(lead__contact_number__icontains=contact_number)
+        lead_transfers = lead_transfers.filter(lead__in=leads_by_contact_number(contact_number))
 
     if start_date:
         lead_transfers = lead_transfers.filter(transfer_date__gte=start_date)
@@ -998,7 +1073,10 @@ def lead_transfers(request):
     if sub_disposition:
         lead_transfers = lead_transfers.filter(sub_disposition__name__icontains=sub_disposition)
 
-    if sort:
+    if search_query:
+        lead_transfers = search_leads(lead_transfers, search_query, lead_path='lead')
+        lead_transfers = lead_transfers.order_by('-search_rank', sort) if sort else lead_transfers.order_by('-search_rank')
+    elif sort:
         lead_transfers = lead_transfers.order_by(sort)
 
     team_leader_transfers = LeadTransferRecord.objects.none()
@@ -1007,49 +1085,21 @@ def lead_transfers(request):
     if profile.role == 'Team Leader':
         team = Team.objects.filter(leader=profile).first()
         team_leader_transfers = lead_transfers.filter(Q(from_user=user.profile) | Q(to_user=user.profile))
-        if search_query:
-            team_leader_transfers = team_leader_transfers.filter(
-                Q(lead__full_name__icontains=search_query) |
-                Q(lead__contact_number__icontains=search_query)
-            )
         if team:
             agent_transfers = lead_transfers.filter(Q(from_user__in=team.agents.all()) | Q(to_user__in=team.agents.all()))
-            if search_query:
-                agent_transfers = agent_transfers.filter(
-                    Q(lead__full_name__icontains=search_query) |
-                    Q(lead__contact_number__icontains=search_query)
-                )
         else:
             agent_transfers = LeadTransferRecord.objects.none()
 
     elif profile.role == 'Agent':
         agent_transfers = lead_transfers.filter(Q(from_user=user.profile) | Q(to_user=user.profile))
-        if search_query:
-            agent_transfers = agent_transfers.filter(
-                Q(lead__full_name__icontains=search_query) |
-                Q(lead__contact_number__icontains=search_query)
-            )
         team_leader_transfers = LeadTransferRecord.objects.none()
 
     elif user.is_superuser:
         team_leader_transfers = lead_transfers.filter(Q(from_user__role='Team Leader') | Q(to_user__role='Team Leader'))
         agent_transfers = lead_transfers.filter(Q(from_user__role='Agent') | Q(to_user__role='Agent'))
 
-    paginator_team_leader_transfers = Paginator(team_leader_transfers, 10)
-    try:
-        team_leader_transfers_page = paginator_team_leader_transfers.page(page)
-    except PageNotAnInteger:
-        team_leader_transfers_page = paginator_team_leader_transfers.page(1)
-    except EmptyPage:
-        team_leader_transfers_page = paginator_team_leader_transfers.page(paginator_team_leader_transfers.num_pages)
-
-    paginator_agent_transfers = Paginator(agent_transfers, 10)
-    try:
-        agent_transfers_page = paginator_agent_transfers.page(page)
-    except PageNotAnInteger:
-        agent_transfers_page = paginator_agent_transfers.page(1)
-    except EmptyPage:
-        agent_transfers_page = paginator_agent_transfers.page(paginator_agent_transfers.num_pages)
+    team_leader_transfers_page = paginate(request, team_leader_transfers, cursor_param='team_leader_cursor')
+    agent_transfers_page = paginate(request, agent_transfers, cursor_param='agent_cursor')
 
     context = {
         'lead_transfers': lead_transfers,
@@ -1136,7 +1186,6 @@ def paid_customers(request):
     payment_method = request.GET.get('payment_method', '')
     payment_status = request.GET.get('payment_status', '')
     team_leader_id = request.GET.get('team_leader', '')
-    page = request.GET.get('page', 1)
 
     if user.is_superuser:
         paid_customers = PaidCustomer.objects.all()
@@ -1153,10 +1202,8 @@ def paid_customers(request):
         paid_customers = PaidCustomer.objects.none()
 
     if search_query:
-        paid_customers = paid_customers.filter(
-            Q(lead__full_name__icontains=search_query) | 
-            Q(lead__contact_number__icontains=search_query) |
-            Q(customer_id__icontains=search_query) 
+        paid_customers = search_leads(
+            paid_customers, search_query, lead_path='lead', extra_filter=Q(customer_id__icontains=search_query)
         )
 
     if disposition:
@@ -1183,24 +1230,25 @@ def paid_customers(request):
             team_members = Team.objects.filter(leader=team_leader).first().agents.all()
             paid_customers = paid_customers.filter(lead__assigned_to__in=team_members)
 
-    paid_customers = paid_customers.order_by(sort_by)
-    customer_invoices = []
-    for customer in paid_customers:
+    if search_query:
+        paid_customers = paid_customers.order_by('-search_rank', sort_by)
+    else:
+        paid_customers = paid_customers.order_by(sort_by)
+    paid_customers = paid_customers.select_related(
+        'lead__assigned_to__user', 'lead__assigned_to_team__leader__user', 'package', 'payment_method'
+    )
+
+    customer_invoices = paginate(request, paid_customers)
+    page_items = []
+    for customer in customer_invoices:
         invoice = customer.invoices.last()
         invoice_pdf_url = invoice.pdf.pdf_file.url if invoice and invoice.pdf else None
-        customer_invoices.append({
+        page_items.append({
             'customer': customer,
             'invoice_pdf_url': invoice_pdf_url
         })
+    customer_invoices.object_list = page_items
 
-    paginator = Paginator(customer_invoices, 10)  
-    try:
-        customer_invoices = paginator.page(page)
-    except PageNotAnInteger:
-        customer_invoices = paginator.page(1)
-    except EmptyPage:
-        customer_invoices = paginator.page(paginator.num_pages)
-        
     context = {
         'team_leaders': UserProfile.objects.filter(role='Team Leader').all(),
         'payment_status_choices': PaidCustomer.PAYMENT_STATUS_CHOICES,
@@ -1295,18 +1343,6 @@ def create_paid_customer(request):
         form = PaidCustomerForm(request.POST, request.FILES)
         if form.is_valid():
             paid_customer = form.save(commit=False)
-            try:
-                lead = Lead.objects.get(contact_number=paid_customer.contact_number)
-                paid_customer.lead = lead
-            except Lead.DoesNotExist:
-                paid_customer.lead = None
-            
-            existing_paid_customer = PaidCustomer.objects.filter(contact_number=paid_customer.contact_number).first()
-            if existing_paid_customer:
-                paid_customer.customer_id = existing_paid_customer.customer_id
-            else:
-                paid_customer.customer_id = str(uuid4().int)[:12]
-            
             paid_customer.save()
             return redirect('paid_customers')
     else:
@@ -1316,29 +1352,25 @@ def create_paid_customer(request):
 
 @login_required
 def autocomplete_leads(request):
-    query = request.GET.get('query')
+    query = request.GET.get('query', '')
     field = request.GET.get('field')
     user = request.user
 
-    if user.is_superuser:
-        leads = Lead.objects.filter(
-            Q(full_name__icontains=query) | Q(contact_number__icontains=query)
-        ).values('full_name', 'contact_number')
-    elif user.role == 'Team Leader':
-        team = Team.objects.filter(leader=user)
-        leads = Lead.objects.filter(
-            Q(full_name__icontains=query) | Q(contact_number__icontains=query),
-            assigned_to_team=team
-        ).values('full_name', 'contact_number')
-    elif user.role == 'Agent':
-        leads = Lead.objects.filter(
-            Q(full_name__icontains=query) | Q(contact_number__icontains=query),
-            assigned_to=user
-        ).values('full_name', 'contact_number')
+    if not query:
+        leads = Lead.objects.none()
+    elif user.is_superuser:
+        leads = Lead.objects.all()
+    elif user.profile.role == 'Team Leader':
+        leads = Lead.objects.filter(assigned_to_team__leader=user.profile)
+    elif user.profile.role == 'Agent':
+        leads = Lead.objects.filter(assigned_to=user.profile)
     else:
-        leads = []
+        leads = Lead.objects.none()
+
+    if query:
+        leads = search_leads(leads, query).order_by('-search_rank', 'id')[:10]
 
-    return JsonResponse(list(leads), safe=False)
+    return JsonResponse(list(leads.values('full_name', 'contact_number')), safe=False)
 
 
 
@@ -1374,12 +1406,6 @@ def edit_paid_customer(request, customerId):
         form = PaidCustomerForm(request.POST, request.FILES, instance=customer)
         if form.is_valid():
             paid_customer = form.save(commit=False)
-            try:
-                lead = Lead.objects.get(contact_number=paid_customer.contact_number)
-                paid_customer.lead = lead
-            except Lead.DoesNotExist:
-                paid_customer.lead = None
-            
             paid_customer.save()
             return redirect('paid_customers')
     else:
@@ -1487,7 +1513,7 @@ def complaints_list(request):
         complaints = complaints.order_by('-id')
 
     # Pagination
-    paginator = Paginator(complaints, 10) 
+    paginator = EstimatedCountPaginator(complaints, 10) 
 
     page_number = request.GET.get('page')
     try:
@@ -1622,15 +1648,7 @@ def attendance(request):
     attendances = attendances.order_by('-id')
 
     # Pagination
-    paginator = Paginator(attendances, 10)  
-
-    page_number = request.GET.get('page')
-    try:
-        attendances = paginator.page(page_number)
-    except PageNotAnInteger:
-        attendances = paginator.page(1)
-    except EmptyPage:
-        attendances = paginator.page(paginator.num_pages)
+    attendances = paginate(request, attendances)
 
     context = {
         'attendances': attendances,
@@ -1688,61 +1706,40 @@ def export_attendance(request):
             'TL BRIEFING', 'QUALITY BRIEFING', 'FLOOR MEETING'
         ]
 
-    attendances = attendances.select_related('user').prefetch_related('breaks')
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Attendance Report"
-    ws.append(headers)
-
-    for attendance in attendances:
-        tea_time = 0
-        lunch_time = 0
-        tl_briefing_time = 0
-        quality_briefing_time = 0
-        floor_meeting_time = 0
-
-        for break_obj in attendance.breaks.all():
-            if break_obj.break_type.name == 'TEA':
-                tea_time += break_obj.break_duration()
-            elif break_obj.break_type.name == 'LUNCH':
-                lunch_time += break_obj.break_duration()
-            elif break_obj.break_type.name == 'TL BRIEFING':
-                tl_briefing_time += break_obj.break_duration()
-            elif break_obj.break_type.name == 'QUALITY BRIEFING':
-                quality_briefing_time += break_obj.break_duration()
-            elif break_obj.break_type.name == 'FLOOR MEETING':
-                floor_meeting_time += break_obj.break_duration()
-
-        tea_time_str = f"{tea_time // 60} hours {tea_time % 60} minutes"
-        lunch_time_str = f"{lunch_time // 60} hours {lunch_time % 60} minutes"
-        tl_briefing_time_str = f"{tl_briefing_time // 60} hours {tl_briefing_time % 60} minutes"
-        quality_briefing_time_str = f"{quality_briefing_time // 60} hours {quality_briefing_time % 60} minutes"
-        floor_meeting_time_str = f"{floor_meeting_time // 60} hours {floor_meeting_time % 60} minutes"
-
-        if attendance.user.role == 'Agent':
-            team_leader_name = 'N/A'
-            team = attendance.user.teams_as_agent.first()
-            if team:
-                team_leader_name = team.leader.user.get_full_name()
-            row = [
-                f"{attendance.date} ({attendance.day})",
-                attendance.user.user.get_full_name(), 
-                team_leader_name,
-                attendance.login_time.strftime('%H:%M') if attendance.login_time else 'N/A',
-                attendance.logout_time.strftime('%H:%M') if attendance.logout_time else 'N/A',
-                attendance.status,
-                attendance.on_time_late,
-                f"{attendance.total_login_time_hours} hours {attendance.total_login_time_minutes} minutes",
-                f"{attendance.total_break_time_hours} hours {attendance.total_break_time_minutes} minutes",
-                attendance.regulation_reason,
-                tea_time_str,
-                lunch_time_str,
-                tl_briefing_time_str,
-                quality_briefing_time_str,
-                floor_meeting_time_str
-            ]
-        else:
+    attendances = attendances.select_related('user__user').prefetch_related('breaks__break_type').order_by('pk')
+
+    team_leader_names = {}
+    for agent_id, first_name, last_name in Team.agents.through.objects.order_by('team_id').values_list(
+        'userprofile_id', 'team__leader__user__first_name', 'team__leader__user__last_name'
+    ):
+        team_leader_names.setdefault(agent_id, f"{first_name} {last_name}".strip())
+
+    def attendance_rows():
+        for attendance in attendances.iterator(chunk_size=2000):
+            tea_time = 0
+            lunch_time = 0
+            tl_briefing_time = 0
+            quality_briefing_time = 0
+            floor_meeting_time = 0
+
+            for break_obj in attendance.breaks.all():
+                if break_obj.break_type.name == 'TEA':
+                    tea_time += break_obj.break_duration()
+                elif break_obj.break_type.name == 'LUNCH':
+                    lunch_time += break_obj.break_duration()
+                elif break_obj.break_type.name == 'TL BRIEFING':
+                    tl_briefing_time += break_obj.break_duration()
+                elif break_obj.break_type.name == 'QUALITY BRIEFING':
+                    quality_briefing_time += break_obj.break_duration()
+                elif break_obj.break_type.name == 'FLOOR MEETING':
+                    floor_meeting_time += break_obj.break_duration()
+
+            tea_time_str = f"{tea_time // 60} hours {tea_time % 60} minutes"
+            lunch_time_str = f"{lunch_time // 60} hours {lunch_time % 60} minutes"
+            tl_briefing_time_str = f"{tl_briefing_time // 60} hours {tl_briefing_time % 60} minutes"
+            quality_briefing_time_str = f"{quality_briefing_time // 60} hours {quality_briefing_time % 60} minutes"
+            floor_meeting_time_str = f"{floor_meeting_time // 60} hours {floor_meeting_time % 60} minutes"
+
             row = [
                 f"{attendance.date} ({attendance.day})",
                 attendance.user.user.get_full_name(),
@@ -1759,13 +1756,11 @@ def export_attendance(request):
                 quality_briefing_time_str,
                 floor_meeting_time_str
             ]
-        ws.append(row)
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="attendance_report.xlsx"'
-    wb.save(response)
+            if attendance.user.role == 'Agent':
+                row.insert(2, team_leader_names.get(attendance.user_id, 'N/A'))
+            yield row
 
-    return response
+    return xlsx_file_response('attendance_report.xlsx', "Attendance Report", headers, attendance_rows())
 
 
 ####################################################################################################################################################
@@ -1775,6 +1770,7 @@ def sales(request):
     search_query = request.GET.get('search_query', '')
     team_leader_id = request.GET.get('team_leader', '')
     sales_achievement = request.GET.get('sales_achievement', '')
+    month = request.GET.get('month', '')
 
     if user.is_superuser:
         agents = UserProfile.objects.filter(role='Agent')
@@ -1801,96 +1797,46 @@ def sales(request):
             team_leader = get_object_or_404(UserProfile, user__id=team_leader_id, role='Team Leader')
             messages.error(request, f"No team exists for Team Leader: {team_leader.user.get_full_name()}")
 
-    sales_summary = []
-
-    for agent in agents:
-        total_sales = Invoice.objects.filter(customer__lead__assigned_to=agent, customer__payment_status='completed').aggregate(total_sales=Sum('customer__amount_with_gst'))['total_sales'] or 0
-        number_of_customers = PaidCustomer.objects.filter(lead__assigned_to=agent, payment_status='completed').count()
-        achievement_percentage = (total_sales / (agent.commitment or 1)) * 100
-        assigned_leads = Lead.objects.filter(assigned_to=agent).count()
-        conversion_rate = (number_of_customers / assigned_leads) * 100 if assigned_leads else 0
-        total_invoice_generated = Invoice.objects.filter(customer__lead__assigned_to=agent, customer__payment_status='completed').count()
-        attendances = Attendance.objects.filter(user=agent.user.id)
-        total_days = attendances.count()
-        if total_days == 0:
-            attendance_percentage = 0.0
-        else:
-            present_days = attendances.filter(status='Present').count()
-            half_day_days = attendances.filter(status='Half day').count()
-            attendance_percentage = ((present_days + half_day_days / 2) / total_days) * 100
-        
-        team_leader = agent.teams_as_agent.first().leader.user.get_full_name() if agent.teams_as_agent.exists() else 'N/A'
-        
-        sales_summary.append({
-            'agent': agent,
-            'team_leader': team_leader,
-            'attendance': round(attendance_percentage, 2),
-            'lead_count': assigned_leads,
-            'conversion': round(conversion_rate, 2),
-            'total_invoice_generated':total_invoice_generated,
-            'sales': round(total_sales, 2),
-            'achievements': round(achievement_percentage, 2),
-            'commitment': agent.commitment,
-        })
-
-    sales_summary.sort(key=lambda x: x['achievements'], reverse=True)
-    for idx, record in enumerate(sales_summary):
-        record['rank'] = idx + 1
+    snapshot_date = snapshot_date_for_month(month) if month else None
+    if snapshot_date:
+        leaderboard = snapshot_leaderboard(agents, snapshot_date)
+    else:
+        if month:
+            messages.error(request, f"No performance snapshot is stored for {month}, showing live figures.")
+        leaderboard = sales_leaderboard(agents)
 
     if sales_achievement:
-        sales_summary = [s for s in sales_summary if s['achievements'] >= int(sales_achievement)]
+        leaderboard = leaderboard.filter(achievements__gte=int(sales_achievement))
+    sales_summary = [sales_summary_row(agent) for agent in leaderboard]
 
     context = {
         'sales_summary': sales_summary,
         'search_query': search_query,
         'team_leader_id': team_leader_id,
         'sales_achievement': sales_achievement,
-        'team_leaders': UserProfile.objects.filter(role='Team Leader'),
+        'month': month if snapshot_date else '',
+        'snapshot_months': snapshot_months(),
+        'team_leaders': UserProfile.objects.filter(role='Team Leader').select_related('user'),
     }
 
     return render(request, 'sales.html', context)
 
 def export_sales(request):
     agents = UserProfile.objects.filter(role='Agent')
-    sales_summary = []
-
-    for agent in agents:
-        total_sales = Invoice.objects.filter(customer__lead__assigned_to=agent, customer__payment_status='completed').aggregate(total_sales=Sum('amount_with_gst'))['total_sales'] or 0
-        number_of_customers = PaidCustomer.objects.filter(lead__assigned_to=agent, payment_status='completed').count()
-        achievement_percentage = (total_sales / (agent.commitment or 1)) * 100
-        assigned_leads = Lead.objects.filter(assigned_to=agent).count()
-        conversion_rate = (number_of_customers / assigned_leads) * 100 if assigned_leads else 0
-        attendances = Attendance.objects.filter(user=agent.user.id)
-        total_days = attendances.count()
-        attendance_percentage = ((attendances.filter(status='Present').count() + attendances.filter(status='Half day').count() / 2) / total_days) * 100 if total_days else 0
-        team_leader = agent.teams_as_agent.first().leader.user.get_full_name() if agent.teams_as_agent.exists() else 'N/A'
-        sales_summary.append({
-            'agent': agent,
-            'team_leader': team_leader,
-            'attendance': round(attendance_percentage, 2),
-            'lead_count': assigned_leads,
-            'conversion': round(conversion_rate, 2),
-            'sales': round(total_sales, 2),
-            'achievements': round(achievement_percentage, 2),
-            'commitment': agent.commitment,
-        })
-
-    sales_summary.sort(key=lambda x: x['achievements'], reverse=True)
-    for idx, record in enumerate(sales_summary):
-        record['rank'] = idx + 1
+    snapshot_date = snapshot_date_for_month(request.GET.get('month', ''))
+    if snapshot_date:
+        leaderboard = snapshot_leaderboard(agents, snapshot_date)
+    else:
+        leaderboard = sales_leaderboard(agents)
+    sales_summary = [sales_summary_row(agent) for agent in leaderboard]
 
     if not sales_summary:
         messages.error(request, "No sales data meets the specified achievement criteria.")
         return HttpResponseRedirect(reverse('sales'))
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Sales Summary"
     headers = ['Rank', 'Agent', 'Team Leader', 'Attendance', 'Lead Count', 'Conversion', 'Sales', 'Achievements', 'Commitment']
-    ws.append(headers)
-
-    for record in sales_summary:
-        ws.append([
+    rows = (
+        [
             record['rank'],
             record['agent'].user.get_full_name(),
             record['team_leader'],
@@ -1899,18 +1845,17 @@ def export_sales(request):
             f"{floatformat(record['conversion'], 2)}%",
             round(record['sales'], 2),
             f"{floatformat(record['achievements'], 2)}%",
-            round(record['commitment'], 2),
-        ])
+            round(record['commitment'] or 0, 2),
+        ]
+        for record in sales_summary
+    )
 
     currency_format = '_("₹"* #,##,##0.00_);_("₹"* (#,##,##0.00);_("₹"* "-"??_);_(@_)'
-    for col_num, header in enumerate(headers, start=1):
-        if header in ['Sales', 'Commitment']:
-            for cell in ws[openpyxl.utils.get_column_letter(col_num)]:
-                cell.number_format = currency_format
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="sales_summary.xlsx"'
-    wb.save(response)
+    filename = f"sales_summary_{snapshot_date:%Y-%m}.xlsx" if snapshot_date else "sales_summary.xlsx"
+    response = xlsx_file_response(
+        filename, "Sales Summary", headers, rows,
+        number_formats={headers.index('Sales'): currency_format, headers.index('Commitment'): currency_format}
+    )
 
     messages.success(request, "Sales data exported successfully.")
     return response
@@ -2038,7 +1983,31 @@ def delete_payment_method(request, payment_method_id):
 @login_required
 def analytics(request):
     user = request.user
-    
+    month = request.GET.get('month', '')
+    snapshot_date = snapshot_date_for_month(month) if month else None
+
+    if snapshot_date:
+        if user.is_superuser:
+            agents = UserProfile.objects.filter(role='Agent')
+            complaints = Complaint.objects.all()
+        elif user.profile.role == 'Team Leader':
+            team = user.profile.teams_as_leader.first()
+            agents = team.agents.filter(role='Agent') if team else UserProfile.objects.none()
+            complaints = Complaint.objects.filter(user__in=agents)
+        else:
+            agents = UserProfile.objects.filter(id=user.profile.id)
+            complaints = Complaint.objects.filter(user=user.profile)
+
+        context = snapshot_analytics(
+            AgentPerformanceSnapshot.objects.filter(agent__in=agents, date=snapshot_date),
+            complaints.filter(created_at__date__range=[snapshot_date.replace(day=1), snapshot_date])
+        )
+        context.update({'month': month, 'snapshot_months': snapshot_months()})
+        return render(request, 'analytics.html', context)
+
+    if month:
+        messages.error(request, f"No performance snapshot is stored for {month}, showing live figures.")
+
     if user.is_superuser:
         total_leads = Lead.objects.all().count()
         total_paid_customers = PaidCustomer.objects.all().count()
@@ -2046,26 +2015,18 @@ def analytics(request):
         invoices = Invoice.objects.all()
         total_revenue = sum(invoice.customer.amount_with_gst for invoice in invoices)
         total_complaints = Complaint.objects.all().count()
-        total_attendances = Attendance.objects.count()
-        total_present = Attendance.objects.filter(status='Present').count()
-        total_absent = Attendance.objects.filter(status='Absent').count()
-        total_half_day = Attendance.objects.filter(status='Half day').count()
-
-        if total_attendances > 0:
-            attendance_rate = ((total_present + total_half_day) / total_attendances) * 100
-        else:
-            attendance_rate = 0
+        attendance_totals = attendance_counts(Attendance.objects.all())
 
         context = {
             'total_leads': total_leads,
             'total_invoice_generated': total_invoice_generated,
             'total_complaints': total_complaints,
-            'attendance_rate': attendance_rate,
+            'attendance_rate': attendance_totals['attendance_rate'],
             'total_paid_customers': total_paid_customers,
             'total_revenue': total_revenue,
-            'total_present': total_present,
-            'total_absent': total_absent,
-            'total_half_day': total_half_day
+            'total_present': attendance_totals['total_present'],
+            'total_absent': attendance_totals['total_absent'],
+            'total_half_day': attendance_totals['total_half_day']
         }
 
     elif user.profile.role == 'Team Leader':
@@ -2082,26 +2043,18 @@ def analytics(request):
         invoices = Invoice.objects.filter(customer__lead__assigned_to__in=agents)
         total_revenue = sum(invoice.customer.amount_with_gst for invoice in invoices)
         total_complaints = Complaint.objects.filter(user__in=agents).count()
-        total_attendances = Attendance.objects.filter(user__in=agents).count()
-        total_present = Attendance.objects.filter(user__in=agents, status='Present').count()
-        total_absent = Attendance.objects.filter(user__in=agents, status='Absent').count()
-        total_half_day = Attendance.objects.filter(user__in=agents, status='Half day').count()
-
-        if total_attendances > 0:
-            attendance_rate = ((total_present + total_half_day) / total_attendances) * 100
-        else:
-            attendance_rate = 0
+        attendance_totals = attendance_counts(Attendance.objects.filter(user__in=agents))
 
         context = {
             'total_leads': total_leads,
             'total_invoice_generated': total_invoice_generated,
             'total_complaints': total_complaints,
-            'attendance_rate': attendance_rate,
+            'attendance_rate': attendance_totals['attendance_rate'],
             'total_paid_customers': total_paid_customers,
             'total_revenue': total_revenue,
-            'total_present': total_present,
-            'total_absent': total_absent,
-            'total_half_day': total_half_day
+            'total_present': attendance_totals['total_present'],
+            'total_absent': attendance_totals['total_absent'],
+            'total_half_day': attendance_totals['total_half_day']
         }
 
     elif user.profile.role == 'Agent':
@@ -2111,28 +2064,21 @@ def analytics(request):
         invoices = Invoice.objects.filter(customer__lead__assigned_to=user.profile)
         total_revenue = sum(invoice.customer.amount_with_gst for invoice in invoices)
         total_complaints = Complaint.objects.filter(user=user.profile).count()
-        total_attendances = Attendance.objects.filter(user=user.profile).count()
-        total_present = Attendance.objects.filter(user=user.profile, status='Present').count()
-        total_absent = Attendance.objects.filter(user=user.profile, status='Absent').count()
-        total_half_day = Attendance.objects.filter(user=user.profile, status='Half day').count()
-
-        if total_attendances > 0:
-            attendance_rate = ((total_present + total_half_day) / total_attendances) * 100
-        else:
-            attendance_rate = 0
+        attendance_totals = attendance_counts(Attendance.objects.filter(user=user.profile))
 
         context = {
             'total_leads': total_leads,
             'total_invoice_generated': total_invoice_generated,
             'total_complaints': total_complaints,
-            'attendance_rate': attendance_rate,
+            'attendance_rate': attendance_totals['attendance_rate'],
             'total_paid_customers': total_paid_customers,
             'total_revenue': total_revenue,
-            'total_present': total_present,
-            'total_absent': total_absent,
-            'total_half_day': total_half_day
+            'total_present': attendance_totals['total_present'],
+            'total_absent': attendance_totals['total_absent'],
+            'total_half_day': attendance_totals['total_half_day']
         }
 
+    context['snapshot_months'] = snapshot_months()
     return render(request, 'analytics.html', context)
 
 #####################################################################################################################################################
@@ -2,12 +2,17 @@ import os
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
-from CallCenter_App.routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'InitCore_CallCenter_CRM.settings')
 
+# Set up Django before importing anything that touches models, so the async views and the
+# websocket consumers can both be served by daphne directly.
+django_asgi_app = get_asgi_application()
+
+from CallCenter_App.routing import websocket_urlpatterns
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         URLRouter(
             websocket_urlpatterns
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'CallCenter_App',
     'dbbackup'
 ]
@@ -88,11 +89,53 @@ WSGI_APPLICATION = 'InitCore_CallCenter_CRM.wsgi.application'
 
 ASGI_APPLICATION = 'InitCore_CallCenter_CRM.asgi.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
-    },
-}
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Lead imports run in `manage.py run_lead_import_worker` and report progress through this layer,
+# which reaches the web processes only through Redis. Without REDIS_URL the in-memory layer stays
+# within one process and the import progress page falls back to polling.
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        },
+    }
+
+# Dashboards, count estimates and their invalidation counters are shared by every web and worker
+# process, so the cache must be too: Redis when REDIS_URL is set, otherwise a database table
+# created with `manage.py createcachetable`.
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        },
+    }
+
+# Seconds a computed dashboard stays cached; writes to sales, leads and attendance clear it sooner.
+DASHBOARD_CACHE_TIMEOUT = 120
+
+# Paginated lists show the planner's row estimate instead of running COUNT(*) once a result set is
+# larger than this, and keep each count cached for PAGINATOR_COUNT_TIMEOUT seconds.
+PAGINATOR_ESTIMATE_THRESHOLD = 50000
+PAGINATOR_COUNT_TIMEOUT = 60
+
+# Country code assumed for 10-digit contact numbers when normalizing them for lookups.
+CONTACT_COUNTRY_CODE = '91'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases